@@ -0,0 +1,567 @@
+# A stand-in for the parts of Lemmy's v3 API used by aiolemmy, serving synthetic data.
+#
+# Usage: python benchmarks/fake_lemmy.py [--port 8536] [--latency-ms 0] [--posts 1000] ...
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+from aiolemmy.lemmy import COMMENT_TREE_LIMIT, MODLOG_ACTION_TYPES, MODLOG_TYPES
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+PUBLISHED = "2024-01-01T00:00:00.000000Z"
+
+# share of the modlog records per type, types not listed don't have any records
+MODLOG_DISTRIBUTION = {
+    "removed_posts": 0.35,
+    "removed_comments": 0.4,
+    "locked_posts": 0.05,
+    "featured_posts": 0.02,
+    "banned_from_community": 0.08,
+    "banned": 0.05,
+    "added_to_community": 0.03,
+    "added": 0.02,
+}
+
+
+@dataclass
+class FakeLemmyConfig:
+    posts: int = 1000
+    comments: int = 1000
+    # replies per comment of the single comment tree, which belongs to post 1
+    comment_branching: int = 3
+    reports: int = 500
+    modlog: int = 2000
+    instances: int = 5000
+    # requests a token issued by /user/login is accepted for, 0 for no limit
+    token_lifetime: int = 0
+    latency: float = 0.0
+
+
+def person(i: int) -> dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"user{i}",
+        "display_name": None,
+        "avatar": None,
+        "banned": False,
+        "published": PUBLISHED,
+        "updated": None,
+        "actor_id": f"https://example.com/u/user{i}",
+        "bio": None,
+        "local": True,
+        "banner": None,
+        "deleted": False,
+        "matrix_user_id": None,
+        "bot_account": False,
+        "ban_expires": None,
+        "instance_id": 1,
+    }
+
+
+def community(i: int) -> dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"community{i}",
+        "title": f"Community {i}",
+        "description": None,
+        "removed": False,
+        "published": PUBLISHED,
+        "updated": None,
+        "deleted": False,
+        "nsfw": False,
+        "actor_id": f"https://example.com/c/community{i}",
+        "local": True,
+        "icon": None,
+        "banner": None,
+        "hidden": False,
+        "posting_restricted_to_mods": False,
+        "instance_id": 1,
+        "visibility": "Public",
+    }
+
+
+def post(i: int, published: str = PUBLISHED) -> dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"Post {i}",
+        "url": None,
+        "body": f"Body of post {i}",
+        "creator_id": i,
+        "community_id": 1,
+        "removed": False,
+        "locked": False,
+        "published": published,
+        "updated": None,
+        "deleted": False,
+        "nsfw": False,
+        "embed_title": None,
+        "embed_description": None,
+        "thumbnail_url": None,
+        "ap_id": f"https://example.com/post/{i}",
+        "local": True,
+        "embed_video_url": None,
+        "language_id": 0,
+        "featured_community": False,
+        "featured_local": False,
+    }
+
+
+def comment(i: int, post_id: int = 1, path: str | None = None) -> dict[str, Any]:
+    return {
+        "id": i,
+        "creator_id": i,
+        "post_id": post_id,
+        "content": f"Comment {i}",
+        "removed": False,
+        "published": PUBLISHED,
+        "updated": None,
+        "deleted": False,
+        "ap_id": f"https://example.com/comment/{i}",
+        "local": True,
+        "path": path if path is not None else f"0.{i}",
+        "distinguished": False,
+        "language_id": 0,
+    }
+
+
+def post_view(i: int, published: str = PUBLISHED) -> dict[str, Any]:
+    return {
+        "post": post(i, published),
+        "creator": person(i),
+        "community": community(1),
+        "creator_banned_from_community": False,
+        "banned_from_community": False,
+        "creator_is_moderator": False,
+        "creator_is_admin": False,
+        "counts": {
+            "post_id": i,
+            "comments": 0,
+            "score": 1,
+            "upvotes": 1,
+            "downvotes": 0,
+            "published": published,
+            "newest_comment_time": published,
+        },
+        "subscribed": "NotSubscribed",
+        "saved": False,
+        "read": False,
+        "hidden": False,
+        "creator_blocked": False,
+        "my_vote": None,
+        "unread_comments": 0,
+    }
+
+
+def comment_view(i: int, post_id: int = 1, path: str | None = None) -> dict[str, Any]:
+    return {
+        "comment": comment(i, post_id, path),
+        "creator": person(i),
+        "post": post(post_id),
+        "community": community(1),
+        "counts": {
+            "comment_id": i,
+            "score": 1,
+            "upvotes": 1,
+            "downvotes": 0,
+            "published": PUBLISHED,
+            "child_count": 0,
+        },
+        "creator_banned_from_community": False,
+        "banned_from_community": False,
+        "creator_is_moderator": False,
+        "creator_is_admin": False,
+        "subscribed": "NotSubscribed",
+        "saved": False,
+        "creator_blocked": False,
+        "my_vote": None,
+    }
+
+
+def report(report_type: str, i: int) -> dict[str, Any]:
+    inner = {
+        "id": i,
+        "creator_id": i,
+        "reason": f"Report {i}",
+        "resolved": False,
+        "resolver_id": None,
+        "published": PUBLISHED,
+        "updated": None,
+    }
+    if report_type == "comment":
+        view = {
+            "comment_report": inner | {"comment_id": i, "original_comment_text": "x"},
+            "comment": comment(i),
+            "post": post(i),
+            "community": community(1),
+            "creator": person(i),
+            "comment_creator": person(i + 1),
+            "counts": comment_view(i)["counts"],
+        }
+    elif report_type == "post":
+        view = {
+            "post_report": inner | {"post_id": i, "original_post_name": "x"},
+            "post": post(i),
+            "community": community(1),
+            "creator": person(i),
+            "post_creator": person(i + 1),
+            "counts": post_view(i)["counts"],
+        }
+    else:
+        view = {
+            "private_message_report": inner
+            | {"private_message_id": i, "original_pm_text": "x"},
+            "private_message": {
+                "id": i,
+                "creator_id": i,
+                "recipient_id": 1,
+                "content": "x",
+                "deleted": False,
+                "read": False,
+                "published": PUBLISHED,
+                "updated": None,
+                "ap_id": f"https://example.com/private_message/{i}",
+                "local": True,
+            },
+            "private_message_creator": person(i),
+            "creator": person(i + 1),
+        }
+
+    return view | {"resolver": None}
+
+
+def modlog_record(type_: str, i: int) -> dict[str, Any]:
+    return {
+        MODLOG_TYPES[type_]: {
+            "id": i,
+            "mod_person_id": 1,
+            "reason": None,
+            "when_": PUBLISHED,
+        },
+        "moderator": person(1),
+        "community": community(1),
+    }
+
+
+def federated_instance(i: int) -> dict[str, Any]:
+    return {
+        "id": i,
+        "domain": f"instance{i}.example.com",
+        "published": PUBLISHED,
+        "updated": None,
+        "software": "lemmy" if i % 3 else "mbin",
+        "version": "0.19.3",
+    }
+
+
+class FakeLemmy:
+    def __init__(self, config: FakeLemmyConfig) -> None:
+        self.config = config
+        self.requests = 0
+        # authenticated requests per user name
+        self.requests_by_user: Counter[str] = Counter()
+        # issued tokens mapped to their user name and remaining uses
+        self.tokens: dict[str, list[Any]] = {}
+        self._token_ids = itertools.count(1)
+
+        # newest first, like Lemmy returns them
+        self.posts = [
+            post_view(i, f"2024-01-01T00:00:00.{i:06d}Z")
+            for i in range(config.posts, 0, -1)
+        ]
+        self.comments = self._comment_tree(config.comments, config.comment_branching)
+        self.reports = {
+            report_type: [report(report_type, i) for i in range(1, config.reports + 1)]
+            for report_type in ("comment", "post", "private_message")
+        }
+        self.modlog = {
+            type_: [
+                modlog_record(type_, i)
+                for i in range(
+                    int(config.modlog * MODLOG_DISTRIBUTION.get(type_, 0)),
+                    0,
+                    -1,
+                )
+            ]
+            for type_ in MODLOG_TYPES
+        }
+        self.instances = [federated_instance(i) for i in range(1, config.instances + 1)]
+
+    @staticmethod
+    def _comment_tree(count: int, branching: int) -> list[dict[str, Any]]:
+        # the first `branching` comments are top level, the others replies in order
+        paths = {0: "0"}
+        parents = {}
+        child_counts = dict.fromkeys(range(1, count + 1), 0)
+        for i in range(1, count + 1):
+            parents[i] = (i - 1) // branching
+            paths[i] = f"{paths[parents[i]]}.{i}"
+            ancestor = parents[i]
+            while ancestor:
+                child_counts[ancestor] += 1
+                ancestor = parents[ancestor]
+
+        comments = []
+        for i in sorted(range(1, count + 1), key=lambda i: paths[i]):
+            view = comment_view(i, path=paths[i])
+            view["counts"]["child_count"] = child_counts[i]
+            comments.append(view)
+        return comments
+
+    @staticmethod
+    def _page(request: web.Request, items: list[Any]) -> list[Any]:
+        limit = int(request.query.get("limit", 10))
+        page = int(request.query.get("page", 1))
+        return items[(page - 1) * limit : page * limit]
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Any,
+    ) -> web.StreamResponse:
+        self.requests += 1
+        if self.config.latency > 0:
+            await asyncio.sleep(self.config.latency)
+
+        # Any token not issued by login is accepted, like the jwt passed to Lemmy.
+        # Like Lemmy, requests with an expired token are handled as anonymous ones.
+        authorization = request.headers.get("Authorization", "")
+        jwt = authorization.removeprefix("Bearer ")
+        token = self.tokens.get(jwt)
+        request["logged_in"] = bool(jwt) and (token is None or token[1] != 0)
+        if token is not None and token[1] != 0:
+            token[1] -= 1
+            self.requests_by_user[token[0]] += 1
+
+        return await handler(request)
+
+    @staticmethod
+    def _not_logged_in() -> web.Response:
+        return web.json_response({"error": "not_logged_in"}, status=400)
+
+    async def login(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        # any non-empty password is accepted
+        if not data["password"]:
+            return web.json_response({"error": "incorrect_login"}, status=401)
+
+        jwt = f"{data['username_or_email']}.{next(self._token_ids)}"
+        self.tokens[jwt] = [data["username_or_email"], self.config.token_lifetime or -1]
+        return web.json_response(
+            {"jwt": jwt, "registration_created": False, "verify_email_sent": False},
+        )
+
+    async def remove_post(self, request: web.Request) -> web.Response:
+        if not request["logged_in"]:
+            return self._not_logged_in()
+
+        data = await request.json()
+        view = post_view(data["post_id"])
+        view["post"]["removed"] = data["removed"]
+        return web.json_response({"post_view": view})
+
+    async def post_list(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 10))
+        cursor = request.query.get("page_cursor")
+        if cursor is not None:
+            offset = int(cursor.removeprefix("o"))
+        else:
+            offset = (int(request.query.get("page", 1)) - 1) * limit
+
+        posts = self.posts[offset : offset + limit]
+        response: dict[str, Any] = {"posts": posts}
+        if offset + limit < len(self.posts):
+            response["next_page"] = f"o{offset + limit}"
+        return web.json_response(response)
+
+    async def comment_list(self, request: web.Request) -> web.Response:
+        comments = self.comments
+        if int(request.query.get("post_id", 1)) != 1:
+            comments = []
+
+        # like Lemmy, max_depth is relative to the parent and includes the parent
+        depth = 0
+        if "parent_id" in request.query:
+            parent_id = int(request.query["parent_id"])
+            parent_path = next(
+                c["comment"]["path"]
+                for c in comments
+                if c["comment"]["id"] == parent_id
+            )
+            depth = parent_path.count(".")
+            comments = [
+                c
+                for c in comments
+                if f"{c['comment']['path']}.".startswith(f"{parent_path}.")
+            ]
+        if "max_depth" in request.query:
+            # like Lemmy 0.19, tree requests are ordered by the parent's path, ignore
+            # pagination and are capped
+            max_depth = depth + int(request.query["max_depth"])
+            comments = sorted(
+                (c for c in comments if c["comment"]["path"].count(".") <= max_depth),
+                key=lambda c: c["comment"]["path"].split(".")[:-1],
+            )
+            return web.json_response({"comments": comments[:COMMENT_TREE_LIMIT]})
+
+        return web.json_response({"comments": self._page(request, comments)})
+
+    async def report_list(self, request: web.Request) -> web.Response:
+        if not request["logged_in"]:
+            return self._not_logged_in()
+
+        report_type = request.match_info["report_type"]
+        return web.json_response(
+            {f"{report_type}_reports": self._page(request, self.reports[report_type])},
+        )
+
+    async def modlog_list(self, request: web.Request) -> web.Response:
+        # like Lemmy, filtering by type_ returns empty lists for the other types
+        action_type = request.query.get("type_", "All")
+        return web.json_response(
+            {
+                type_: (
+                    self._page(request, records)
+                    if action_type in ("All", MODLOG_ACTION_TYPES[type_])
+                    else []
+                )
+                for type_, records in self.modlog.items()
+            },
+        )
+
+    async def user(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "person_view": {
+                    "person": person(1),
+                    "counts": {"person_id": 1, "post_count": 0, "comment_count": 0},
+                    "is_admin": False,
+                },
+                "comments": self._page(request, self.comments),
+                "posts": self._page(request, self.posts),
+                "moderates": [],
+            },
+        )
+
+    async def federated_instances(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "federated_instances": {
+                    "linked": self.instances,
+                    "allowed": [],
+                    "blocked": self.instances[::50],
+                },
+            },
+        )
+
+    async def site(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "site_view": {
+                    "local_site_rate_limit": {
+                        "message": 999,
+                        "message_per_second": 60,
+                        "post": 999,
+                        "post_per_second": 600,
+                        "register": 999,
+                        "register_per_second": 3600,
+                        "image": 999,
+                        "image_per_second": 3600,
+                        "comment": 999,
+                        "comment_per_second": 600,
+                        "search": 999,
+                        "search_per_second": 600,
+                    },
+                },
+            },
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/api/v3/post/list", self.post_list)
+        app.router.add_get("/api/v3/comment/list", self.comment_list)
+        app.router.add_get(
+            "/api/v3/{report_type:comment|post|private_message}/report/list",
+            self.report_list,
+        )
+        app.router.add_get("/api/v3/modlog", self.modlog_list)
+        app.router.add_get("/api/v3/user", self.user)
+        app.router.add_get("/api/v3/federated_instances", self.federated_instances)
+        app.router.add_get("/api/v3/site", self.site)
+        app.router.add_post("/api/v3/user/login", self.login)
+        app.router.add_post("/api/v3/post/remove", self.remove_post)
+        return app
+
+
+class FakeLemmyServer:
+    # Runs a FakeLemmy on its own thread and event loop, so serving responses doesn't
+    # compete with the client being measured.
+
+    def __init__(self, config: FakeLemmyConfig) -> None:
+        self.lemmy = FakeLemmy(config)
+        self.url = ""
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self.lemmy.app(), access_log=None)
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start(self) -> None:
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8536)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    for name, default in vars(FakeLemmyConfig()).items():
+        if name != "latency":
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+            )
+    args = parser.parse_args()
+
+    config = FakeLemmyConfig(
+        posts=args.posts,
+        comments=args.comments,
+        comment_branching=args.comment_branching,
+        reports=args.reports,
+        modlog=args.modlog,
+        instances=args.instances,
+        token_lifetime=args.token_lifetime,
+        latency=args.latency_ms / 1000,
+    )
+    web.run_app(FakeLemmy(config).app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Compares memory usage and decoding time of raw response dicts and aiolemmy's models.
+#
+# Usage: python benchmarks/models.py [count]
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from fake_lemmy import post_view
+
+from aiolemmy import PostView
+
+
+def measure(name: str, body: bytes, build: Any) -> None:
+    gc.collect()
+    tracemalloc.start()
+    result = build(json.loads(body)["posts"])
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    # timed separately, as tracemalloc slows down allocations considerably
+    gc.collect()
+    start = time.perf_counter()
+    posts = json.loads(body)["posts"]
+    decoded = time.perf_counter()
+    result = build(posts)
+    built = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "benchmark": name,
+                "count": len(result),
+                "retained_bytes": retained,
+                "bytes_per_view": retained // len(result),
+                "json_seconds": round(decoded - start, 4),
+                "model_seconds": round(built - decoded, 4),
+            },
+        ),
+    )
+
+
+def decode_all(views: list[PostView]) -> list[PostView]:
+    for view in views:
+        _ = (view.post, view.creator, view.community, view.counts)
+    return views
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    body = json.dumps({"posts": [post_view(i) for i in range(count)]}).encode()
+
+    measure("raw dicts", body, lambda posts: posts)
+    measure(
+        "models, lazy",
+        body,
+        lambda posts: [PostView.from_dict(p) for p in posts],
+    )
+    measure(
+        "models, post accessed",
+        body,
+        lambda posts: [v for v in (PostView.from_dict(p) for p in posts) if v.post],
+    )
+    measure(
+        "models, fully decoded",
+        body,
+        lambda posts: decode_all([PostView.from_dict(p) for p in posts]),
+    )
+
+
+if __name__ == "__main__":
+    main()
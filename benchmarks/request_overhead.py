@@ -0,0 +1,120 @@
+# Measures the per-call overhead of aiolemmy's request path, excluding the network,
+# by answering every request with the same canned response.
+#
+# Usage: python benchmarks/request_overhead.py [calls]
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from aiolemmy import Lemmy, Response, Transport
+
+
+class CannedResponse:
+    status = 200
+    reason = "OK"
+    ok = True
+    content_type = "application/json"
+    content_length = 19
+    history = ()
+    headers = CIMultiDictProxy(CIMultiDict({"Content-Type": "application/json"}))
+
+    async def read(self) -> bytes:
+        return b'{"post_reports":[]}'
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def release(self) -> None:
+        pass
+
+
+class CannedTransport(Transport):
+    def __init__(self) -> None:
+        self.response: Any = CannedResponse()
+
+    async def request(self, method: str, url: Any, **kwargs: Any) -> Response:  # noqa: ARG002
+        return self.response
+
+
+async def list_posts(lemmy: Lemmy) -> None:
+    await lemmy.list_posts(
+        community_name="lemmy",
+        limit=50,
+        page=2,
+        saved_only=False,
+        sort="New",
+        type_="All",
+    )
+
+
+async def list_comments(lemmy: Lemmy) -> None:
+    await lemmy.list_comments(
+        post_id=1,
+        max_depth=8,
+        limit=50,
+        page=1,
+        liked_only=False,
+        sort="Old",
+        type_="All",
+    )
+
+
+async def get_post_reports(lemmy: Lemmy) -> None:
+    await lemmy.get_post_reports(unresolved_only=True, limit=10)
+
+
+async def remove_post(lemmy: Lemmy) -> None:
+    await lemmy.remove_post(1, True, "spam")  # noqa: FBT003
+
+
+BENCHMARKS = {
+    "list_posts": list_posts,
+    "list_comments": list_comments,
+    "get_post_reports": get_post_reports,
+    "remove_post": remove_post,
+}
+
+
+async def main_async(calls: int) -> None:
+    async with aiohttp.ClientSession() as session:
+        lemmy = Lemmy(
+            session,
+            "https://lemmy.example.com",
+            jwt="token",
+            transport=CannedTransport(),
+        )
+
+        for name, call in BENCHMARKS.items():
+            for _ in range(calls // 10):
+                await call(lemmy)
+
+            start = time.perf_counter()
+            for _ in range(calls):
+                await call(lemmy)
+            elapsed = time.perf_counter() - start
+
+            print(
+                json.dumps(
+                    {
+                        "benchmark": name,
+                        "calls": calls,
+                        "us_per_call": round(elapsed / calls * 1e6, 2),
+                    },
+                ),
+            )
+
+
+def main() -> None:
+    asyncio.run(main_async(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
+
+
+if __name__ == "__main__":
+    main()
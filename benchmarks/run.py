@@ -0,0 +1,194 @@
+# Measures wall time, throughput and peak memory of aiolemmy's paginating methods
+# against a local fake Lemmy server. Runs offline and prints one JSON object per
+# benchmark, so results of different commits can be compared with e.g. jq.
+#
+# Usage: python benchmarks/run.py [--latency-ms 0] [--repeat 5] [--prefetch 0] ...
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fake_lemmy import FakeLemmyConfig, FakeLemmyServer
+
+from aiolemmy import Lemmy
+
+Scenario = Callable[[Lemmy, argparse.Namespace], Awaitable[int]]
+
+
+async def community_posts(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    return len(await lemmy.get_community_posts("community1", count=args.posts))
+
+
+async def modlog(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    records = await lemmy.get_modlog(limit=None, prefetch=args.prefetch)
+    return sum(len(r) for r in records.values())
+
+
+async def modlog_by_type(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    records = await lemmy.get_modlog_by_type(
+        limit=None,
+        concurrency=args.concurrency,
+        prefetch=args.prefetch,
+    )
+    return sum(len(r) for r in records.values())
+
+
+async def person_details(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    details = await lemmy.get_person_details(
+        person_id=1,
+        limit=None,
+        prefetch=args.prefetch,
+    )
+    return len(details["posts"]) + len(details["comments"])
+
+
+async def person_posts(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    content = await lemmy.get_person_content(
+        person_id=1,
+        post_limit=None,
+        comment_limit=0,
+        prefetch=args.prefetch,
+    )
+    return len(content["posts"])
+
+
+async def comment_tree(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    return len(await lemmy.get_comment_tree(1, concurrency=args.concurrency))
+
+
+async def comment_reports(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    return len(await lemmy.get_comment_reports(limit=None, prefetch=args.prefetch))
+
+
+async def post_reports(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    return len(await lemmy.get_post_reports(limit=None, prefetch=args.prefetch))
+
+
+async def private_message_reports(lemmy: Lemmy, args: argparse.Namespace) -> int:
+    return len(
+        await lemmy.get_private_message_reports(limit=None, prefetch=args.prefetch),
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "get_community_posts": community_posts,
+    "get_modlog": modlog,
+    "get_modlog_by_type": modlog_by_type,
+    "get_person_details": person_details,
+    "get_person_content_posts": person_posts,
+    "get_comment_tree": comment_tree,
+    "get_comment_reports": comment_reports,
+    "get_post_reports": post_reports,
+    "get_private_message_reports": private_message_reports,
+}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(
+    name: str,
+    scenario: Scenario,
+    server: FakeLemmyServer,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    # reports require a login, any token is accepted
+    async with Lemmy(None, server.url, jwt="benchmark") as lemmy:
+        # warm up the connection pool and code paths
+        await scenario(lemmy, args)
+
+        wall_times = []
+        requests = items = 0
+        for _ in range(args.repeat):
+            gc.collect()
+            requests_before = server.lemmy.requests
+            start = time.perf_counter()
+            items = await scenario(lemmy, args)
+            wall_times.append(time.perf_counter() - start)
+            requests = server.lemmy.requests - requests_before
+
+        # measured separately, as tracemalloc slows down allocations considerably
+        gc.collect()
+        tracemalloc.start()
+        await scenario(lemmy, args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    wall_time = statistics.median(wall_times)
+    return {
+        "benchmark": name,
+        "items": items,
+        "requests": requests,
+        "wall_seconds": round(wall_time, 4),
+        "wall_seconds_min": round(min(wall_times), 4),
+        "items_per_second": round(items / wall_time, 1),
+        "requests_per_second": round(requests / wall_time, 1),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    config = FakeLemmyConfig(
+        posts=args.posts,
+        comments=args.comments,
+        comment_branching=args.comment_branching,
+        reports=args.reports,
+        modlog=args.modlog,
+        instances=args.instances,
+        token_lifetime=args.token_lifetime,
+        latency=args.latency_ms / 1000,
+    )
+    context = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "latency_ms": args.latency_ms,
+        "prefetch": args.prefetch,
+        "concurrency": args.concurrency,
+        "repeat": args.repeat,
+    }
+
+    with FakeLemmyServer(config) as server:
+        for name in args.only or SCENARIOS:
+            result = await run(name, SCENARIOS[name], server, args)
+            print(json.dumps(context | result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--prefetch", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", choices=SCENARIOS)
+    for name, default in vars(FakeLemmyConfig()).items():
+        if name != "latency":
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+            )
+
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
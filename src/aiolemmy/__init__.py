@@ -1,9 +1,88 @@
+from ._auth import Account, AuthManager, Credentials
+from ._bulk import BulkResult, run_bulk
+from ._cache import CacheBackend, CacheEntry, MemoryCache
+from ._checkpoint import (
+    CheckpointStore,
+    JSONFileCheckpointStore,
+    MemoryCheckpointStore,
+)
+from ._comment_tree import CommentTree
+from ._connection import ConnectionConfig
+from ._content_store import ContentStore
+from ._crawler import PostCrawl
+from ._federation import (
+    FederatedInstance,
+    FederatedSnapshot,
+    FederatedSnapshotDiff,
+    block_instances,
+)
+from ._metrics import HistogramAggregator, MetricsSink, RequestMetrics
+from ._models import (
+    CommentReportView,
+    CommentView,
+    ModlogRecord,
+    PersonView,
+    PostReportView,
+    PostView,
+    PrivateMessageReportView,
+)
+from ._pool import FanOutResult, LemmyPool
+from ._rate_limit import RateLimiter
+from ._report_watcher import ReportEvent, ReportWatcher
+from ._retry import RetryPolicy
+from ._transport import (
+    AiohttpTransport,
+    RecordingTransport,
+    ReplayTransport,
+    Response,
+    Transport,
+)
 from ._version import version
 from .lemmy import Lemmy
 
 __version__ = version
 
 __all__ = [
+    "Account",
+    "AiohttpTransport",
+    "AuthManager",
+    "BulkResult",
+    "CacheBackend",
+    "CacheEntry",
+    "CheckpointStore",
+    "CommentReportView",
+    "CommentTree",
+    "CommentView",
+    "ConnectionConfig",
+    "ContentStore",
+    "Credentials",
+    "FanOutResult",
+    "FederatedInstance",
+    "FederatedSnapshot",
+    "FederatedSnapshotDiff",
+    "HistogramAggregator",
+    "JSONFileCheckpointStore",
     "Lemmy",
+    "LemmyPool",
+    "MemoryCache",
+    "MemoryCheckpointStore",
+    "MetricsSink",
+    "ModlogRecord",
+    "PersonView",
+    "PostCrawl",
+    "PostReportView",
+    "PostView",
+    "PrivateMessageReportView",
+    "RateLimiter",
+    "RecordingTransport",
+    "ReplayTransport",
+    "ReportEvent",
+    "ReportWatcher",
+    "RequestMetrics",
+    "Response",
+    "RetryPolicy",
+    "Transport",
+    "block_instances",
+    "run_bulk",
     "version",
 ]
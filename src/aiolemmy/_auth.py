@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from aiolemmy.lemmy import Lemmy
+
+AccountSelection = Literal["round_robin", "least_recently_used"]
+
+
+@dataclass(frozen=True)
+class Credentials:
+    username_or_email: str
+    password: str = field(repr=False)
+
+
+class Account:
+    # An account used by AuthManager. Accounts with credentials log in on first use and
+    # again once their token is rejected, accounts with only a jwt keep using it.
+
+    __slots__ = ("_lock", "credentials", "jwt", "last_used")
+
+    def __init__(
+        self,
+        credentials: Credentials | None = None,
+        *,
+        jwt: str | None = None,
+    ) -> None:
+        if credentials is None and jwt is None:
+            msg = "an account needs credentials or a jwt"
+            raise ValueError(msg)
+
+        self.credentials = credentials
+        self.jwt = jwt
+        # time.monotonic() of the last request the account was selected for
+        self.last_used = 0.0
+        self._lock = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        name = self.credentials.username_or_email if self.credentials else "<jwt>"
+        return f"Account({name!r})"
+
+    async def _login(self, lemmy: Lemmy) -> str:
+        if self.credentials is None:
+            msg = "account has no credentials to log in with"
+            raise ValueError(msg)
+
+        j = await lemmy.login(
+            self.credentials.username_or_email,
+            self.credentials.password,
+        )
+        jwt = j.get("jwt")
+        if jwt is None:
+            # e.g. if the registration hasn't been approved or the email verified yet
+            msg = f"login of {self.credentials.username_or_email} returned no token"
+            raise PermissionError(msg)
+
+        return jwt
+
+    async def token(self, lemmy: Lemmy) -> str:
+        jwt = self.jwt
+        if jwt is None:
+            async with self._lock:
+                jwt = self.jwt
+                if jwt is None:
+                    jwt = self.jwt = await self._login(lemmy)
+
+        return jwt
+
+    async def refresh(self, lemmy: Lemmy, rejected_jwt: str | None) -> str | None:
+        # Logs in again after rejected_jwt was rejected, unless another request already
+        # did. Returns the new token, or None if the account can't log in.
+        if self.credentials is None:
+            return None
+
+        async with self._lock:
+            jwt = self.jwt
+            if jwt is None or jwt == rejected_jwt:
+                jwt = self.jwt = await self._login(lemmy)
+
+        return jwt
+
+
+class AuthManager:
+    # Provides the tokens for a Lemmy client from a pool of accounts.
+    #
+    # Reads are spread over all accounts, either in turn with "round_robin" or by
+    # picking the account that has been idle the longest with "least_recently_used".
+    # Writes always use the write account, so e.g. removals are attributed to a single
+    # moderator. Accounts should have the same permissions and see the same content, as
+    # consecutive pages may be requested by different accounts.
+
+    def __init__(
+        self,
+        accounts: Iterable[Account | Credentials],
+        *,
+        selection: AccountSelection = "round_robin",
+        write_account: int = 0,
+    ) -> None:
+        self._accounts = tuple(
+            account if isinstance(account, Account) else Account(account)
+            for account in accounts
+        )
+        if not self._accounts:
+            msg = "at least one account is required"
+            raise ValueError(msg)
+
+        self._selection = selection
+        # index into accounts
+        self._write_account = self._accounts[write_account]
+        self._round_robin = itertools.cycle(self._accounts)
+
+    @property
+    def accounts(self) -> tuple[Account, ...]:
+        return self._accounts
+
+    @property
+    def write_account(self) -> Account:
+        return self._write_account
+
+    def select(self, *, write: bool = False) -> Account:
+        if write:
+            account = self._write_account
+        elif self._selection == "round_robin":
+            account = next(self._round_robin)
+        else:
+            account = min(self._accounts, key=attrgetter("last_used"))
+
+        account.last_used = time.monotonic()
+        return account
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from ._rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class BulkResult(Generic[T]):
+    action: Callable[[], Awaitable[T]]
+    result: T | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_bulk(
+    actions: Iterable[Callable[[], Awaitable[T]]],
+    *,
+    concurrency: int = 8,
+    max_per_second: float | None = None,
+) -> list[BulkResult[T]]:
+    # Runs actions, e.g. functools.partial(lemmy.remove_post, post_id, True),
+    # with at most `concurrency` of them at the same time.
+    # Failing actions don't affect the others, their exception is returned in the
+    # result at the same position as the action instead.
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if max_per_second is not None and max_per_second <= 0:
+        raise ValueError("max_per_second must be positive")
+
+    actions = list(actions)
+    results: dict[int, BulkResult[T]] = {}
+    bucket = None
+    if max_per_second is not None:
+        # the bucket holds at least one token, so slower rates refill a single token
+        bucket = (
+            TokenBucket(max_per_second, 1)
+            if max_per_second >= 1
+            else TokenBucket(1, 1 / max_per_second)
+        )
+    queue = iter(enumerate(actions))
+
+    async def worker() -> None:
+        for i, action in queue:
+            if bucket is not None:
+                await bucket.acquire()
+
+            try:
+                results[i] = BulkResult(action, result=await action())
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Bulk action %r failed: %s", action, e)
+                results[i] = BulkResult(action, error=e)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(actions)))))
+
+    failed = sum(1 for result in results.values() if not result.ok)
+    logger.debug("Ran %s bulk actions, %s failed", len(actions), failed)
+
+    return [results[i] for i in range(len(actions))]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import abc
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# TTLs in seconds by endpoint path for responses that rarely change
+DEFAULT_CACHE_TTLS: dict[str, float] = {
+    "/api/v3/site": 60.0,
+    "/api/v3/federated_instances": 3600.0,
+}
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    body: bytes
+    # unix timestamp, so entries can be shared between processes
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class CacheBackend(abc.ABC):
+    # Entries are kept past their expiry so they can be revalidated,
+    # backends are free to evict them at any time.
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> CacheEntry | None: ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abc.abstractmethod
+    async def clear(self) -> None: ...
+
+
+class MemoryCache(CacheBackend):
+    def __init__(self, max_entries: int = 128) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    async def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
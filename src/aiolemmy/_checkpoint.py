@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+class CheckpointStore(abc.ABC):
+    # Persists small JSON-serializable checkpoints, e.g. modlog high-water marks
+
+    @abc.abstractmethod
+    async def load(self, key: str) -> Any | None: ...
+
+    @abc.abstractmethod
+    async def save(self, key: str, checkpoint: Any) -> None: ...
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    def __init__(self) -> None:
+        self._checkpoints: dict[str, Any] = {}
+
+    async def load(self, key: str) -> Any | None:
+        return self._checkpoints.get(key)
+
+    async def save(self, key: str, checkpoint: Any) -> None:
+        self._checkpoints[key] = checkpoint
+
+
+class JSONFileCheckpointStore(CheckpointStore):
+    # Keeps all checkpoints in a single JSON file, which is replaced atomically on save
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._path = Path(path)
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            with self._path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, checkpoints: dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(
+            dir=self._path.parent,
+            prefix=f".{self._path.name}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(checkpoints, f, indent=2, sort_keys=True)
+            Path(tmp).replace(self._path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    async def load(self, key: str) -> Any | None:
+        async with self._lock:
+            return self._read().get(key)
+
+    async def save(self, key: str, checkpoint: Any) -> None:
+        async with self._lock:
+            checkpoints = self._read()
+            checkpoints[key] = checkpoint
+            self._write(checkpoints)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Comments of a post as a flat, array backed tree.
+#
+# Rows are sorted by Lemmy's comment path, which places every comment directly after
+# its parent and keeps subtrees contiguous: the subtree of a row spans
+# rows[row : row + subtree_size(row)]. Parents are stored as row indices, -1 for top
+# level comments. Comments whose parent wasn't returned, e.g. because it was purged,
+# are attached to their closest known ancestor.
+
+
+def _path_ids(path: str) -> tuple[int, ...]:
+    # "0.12.34" -> (12, 34), the leading 0 is the post
+    return tuple(int(part) for part in path.split(".")[1:])
+
+
+class CommentTree:
+    __slots__ = ("_comments", "_ids", "_parents", "_rows", "_sizes")
+
+    def __init__(self, comments: Iterable[Any]) -> None:
+        # comments as comment views, e.g. from list_comments, duplicates are dropped
+        unique = {view["comment"]["id"]: view for view in comments}
+        paths = {
+            id_: _path_ids(view["comment"]["path"]) for id_, view in unique.items()
+        }
+        order = sorted(unique, key=paths.__getitem__)
+
+        self._comments: list[Any] = [unique[id_] for id_ in order]
+        self._ids = array("q", order)
+        self._rows: dict[int, int] = {id_: row for row, id_ in enumerate(order)}
+
+        self._parents = array("q", [-1]) * len(order)
+        for row, id_ in enumerate(order):
+            # the closest ancestor that is part of the tree
+            for ancestor in reversed(paths[id_][:-1]):
+                parent = self._rows.get(ancestor)
+                if parent is not None:
+                    self._parents[row] = parent
+                    break
+
+        # children come after their parents, so sizes are complete when propagated
+        # in reverse
+        self._sizes = array("q", [1]) * len(order)
+        for row in range(len(order) - 1, -1, -1):
+            parent = self._parents[row]
+            if parent != -1:
+                self._sizes[parent] += self._sizes[row]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, row: int) -> Any:
+        return self._comments[row]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._comments)
+
+    def __contains__(self, comment_id: object) -> bool:
+        return comment_id in self._rows
+
+    def row(self, comment_id: int) -> int:
+        return self._rows[comment_id]
+
+    def comment_id(self, row: int) -> int:
+        return self._ids[row]
+
+    def parent(self, row: int) -> int:
+        return self._parents[row]
+
+    def subtree_size(self, row: int) -> int:
+        return self._sizes[row]
+
+    def _siblings_from(self, row: int, end: int) -> Iterator[int]:
+        while row < end:
+            yield row
+            row += self._sizes[row]
+
+    def roots(self) -> list[int]:
+        return [row for row, parent in enumerate(self._parents) if parent == -1]
+
+    def children(self, row: int) -> list[int]:
+        return list(self._siblings_from(row + 1, row + self._sizes[row]))
+
+    def descendants(self, row: int) -> range:
+        return range(row + 1, row + self._sizes[row])
+
+    def depth(self, row: int) -> int:
+        # 1 for top level comments
+        return self._comments[row]["comment"]["path"].count(".")
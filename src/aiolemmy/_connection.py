@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+
+
+@dataclass(frozen=True)
+class ConnectionConfig:
+    # Connector settings for sessions created by aiolemmy, e.g. by Lemmy when no
+    # session is passed.
+
+    # open connections in total and per host, 0 for no limit
+    limit: int = 100
+    limit_per_host: int = 16
+    # seconds idle connections are kept open for reuse, below the 75 seconds after
+    # which nginx closes them by default, so connections aren't reused just as
+    # they're being closed by the server
+    keepalive_timeout: float = 60.0
+    # seconds resolved addresses are cached, None to cache them indefinitely
+    ttl_dns_cache: int | None = 300
+    # seconds before attempting the next address when connecting, None to disable
+    # happy eyeballs and attempt addresses one at a time
+    happy_eyeballs_delay: float | None = 0.25
+    # whether to ask for compressed responses
+    compression: bool = True
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            happy_eyeballs_delay=self.happy_eyeballs_delay,
+        )
+
+    def create_session(self, **kwargs: Any) -> aiohttp.ClientSession:
+        # kwargs are passed on to aiohttp.ClientSession
+        if not self.compression:
+            kwargs["headers"] = {"Accept-Encoding": "identity"} | dict(
+                kwargs.get("headers", {}),
+            )
+
+        return aiohttp.ClientSession(connector=self.create_connector(), **kwargs)
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+from typing import TYPE_CHECKING, Any
+
+from ._crawler import parse_published
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Iterable
+    from datetime import datetime
+    from types import TracebackType
+
+# Posts, comments and reports of a single instance, stored as their views by id in a
+# SQLite database, along with watermarks that let crawls stop at content stored by a
+# previous run.
+#
+# Ids are local to an instance, so the instance is recorded on first use by a Lemmy
+# client and other instances are refused.
+# Timestamps are stored as seconds since the epoch, views as JSON.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    community_id INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL,
+    published REAL NOT NULL,
+    view TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_community ON posts (community_id, published);
+CREATE INDEX IF NOT EXISTS posts_creator ON posts (creator_id, published);
+CREATE INDEX IF NOT EXISTS posts_published ON posts (published);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL,
+    community_id INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL,
+    published REAL NOT NULL,
+    view TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id);
+CREATE INDEX IF NOT EXISTS comments_community ON comments (community_id, published);
+CREATE INDEX IF NOT EXISTS comments_creator ON comments (creator_id, published);
+CREATE INDEX IF NOT EXISTS comments_published ON comments (published);
+
+CREATE TABLE IF NOT EXISTS reports (
+    report_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    community_id INTEGER,
+    creator_id INTEGER NOT NULL,
+    resolved INTEGER NOT NULL,
+    published REAL NOT NULL,
+    view TEXT NOT NULL,
+    PRIMARY KEY (report_type, id)
+);
+CREATE INDEX IF NOT EXISTS reports_community ON reports (community_id, published);
+CREATE INDEX IF NOT EXISTS reports_creator ON reports (creator_id, published);
+CREATE INDEX IF NOT EXISTS reports_published ON reports (report_type, published);
+"""
+
+REPORT_TYPES = ("comment", "post", "private_message")
+
+
+def _timestamp(value: str) -> float:
+    return parse_published(value).timestamp()
+
+
+class ContentStore:
+    def __init__(self, path: str | os.PathLike[str] = ":memory:") -> None:
+        self._db = sqlite3.connect(path)
+        # WAL allows reading from other connections, e.g. for analytics, while a
+        # crawl is writing
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def check_instance(self, instance: str) -> None:
+        # records the instance on first use, raises ValueError for any other instance
+        with self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('instance', ?)",
+                (instance,),
+            )
+            (stored,) = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'instance'",
+            ).fetchone()
+
+        if stored != instance:
+            msg = f"store contains content of {stored}, not {instance}"
+            raise ValueError(msg)
+
+    def get_watermark(self, key: str) -> Any | None:
+        row = self._db.execute(
+            "SELECT value FROM watermarks WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set_watermark(self, key: str, value: Any) -> None:
+        # value must be JSON serializable
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def upsert_posts(self, views: Iterable[Any]) -> None:
+        with self._db:
+            self._db.executemany(
+                """
+                INSERT INTO posts (id, community_id, creator_id, published, view)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET view = excluded.view
+                """,
+                (
+                    (
+                        view["post"]["id"],
+                        view["post"]["community_id"],
+                        view["post"]["creator_id"],
+                        _timestamp(view["post"]["published"]),
+                        json.dumps(view),
+                    )
+                    for view in views
+                ),
+            )
+
+    def upsert_comments(self, views: Iterable[Any]) -> None:
+        with self._db:
+            self._db.executemany(
+                """
+                INSERT INTO comments
+                    (id, post_id, community_id, creator_id, published, view)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET view = excluded.view
+                """,
+                (
+                    (
+                        view["comment"]["id"],
+                        view["comment"]["post_id"],
+                        view["community"]["id"],
+                        view["comment"]["creator_id"],
+                        _timestamp(view["comment"]["published"]),
+                        json.dumps(view),
+                    )
+                    for view in views
+                ),
+            )
+
+    def upsert_reports(self, report_type: str, views: Iterable[Any]) -> None:
+        # report_type is one of REPORT_TYPES, creator is the reporting person
+        if report_type not in REPORT_TYPES:
+            msg = f"unknown report type: {report_type}"
+            raise ValueError(msg)
+
+        report_key = f"{report_type}_report"
+        with self._db:
+            self._db.executemany(
+                """
+                INSERT INTO reports (
+                    report_type, id, community_id, creator_id, resolved, published,
+                    view
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (report_type, id) DO UPDATE SET
+                    resolved = excluded.resolved,
+                    view = excluded.view
+                """,
+                (
+                    (
+                        report_type,
+                        view[report_key]["id"],
+                        view["community"]["id"] if "community" in view else None,
+                        view[report_key]["creator_id"],
+                        view[report_key]["resolved"],
+                        _timestamp(view[report_key]["published"]),
+                        json.dumps(view),
+                    )
+                    for view in views
+                ),
+            )
+
+    def _query(
+        self,
+        table: str,
+        filters: dict[str, Any],
+        *,
+        published_after: datetime | None,
+        published_before: datetime | None,
+        limit: int | None,
+    ) -> list[Any]:
+        # Views matching all filters that aren't None, newest first. table and the
+        # filter names are never user input.
+        conditions = [
+            f"{column} = ?" for column, value in filters.items() if value is not None
+        ]
+        params: list[Any] = [value for value in filters.values() if value is not None]
+        if published_after is not None:
+            conditions.append("published > ?")
+            params.append(published_after.timestamp())
+        if published_before is not None:
+            conditions.append("published < ?")
+            params.append(published_before.timestamp())
+
+        sql = f"SELECT view FROM {table}"  # noqa: S608
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += " ORDER BY published DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [json.loads(view) for (view,) in self._db.execute(sql, params)]
+
+    def posts(
+        self,
+        *,
+        community_id: int | None = None,
+        creator_id: int | None = None,
+        published_after: datetime | None = None,
+        published_before: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[Any]:
+        return self._query(
+            "posts",
+            {"community_id": community_id, "creator_id": creator_id},
+            published_after=published_after,
+            published_before=published_before,
+            limit=limit,
+        )
+
+    def comments(
+        self,
+        *,
+        post_id: int | None = None,
+        community_id: int | None = None,
+        creator_id: int | None = None,
+        published_after: datetime | None = None,
+        published_before: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[Any]:
+        return self._query(
+            "comments",
+            {
+                "post_id": post_id,
+                "community_id": community_id,
+                "creator_id": creator_id,
+            },
+            published_after=published_after,
+            published_before=published_before,
+            limit=limit,
+        )
+
+    def reports(
+        self,
+        report_type: str,
+        *,
+        community_id: int | None = None,
+        creator_id: int | None = None,
+        resolved: bool | None = None,
+        published_after: datetime | None = None,
+        published_before: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[Any]:
+        return self._query(
+            "reports",
+            {
+                "report_type": report_type,
+                "community_id": community_id,
+                "creator_id": creator_id,
+                "resolved": resolved,
+            },
+            published_after=published_after,
+            published_before=published_before,
+            limit=limit,
+        )
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def parse_published(value: str) -> datetime:
+    # Lemmy 0.19 timestamps end in Z, which fromisoformat only accepts from Python 3.11
+    # on, while older versions return timestamps without a timezone, which are UTC
+    return as_utc(datetime.fromisoformat(value.removesuffix("Z")))
+
+
+def as_utc(value: datetime) -> datetime:
+    # datetimes without a timezone are taken to be UTC, like Lemmy's timestamps, so
+    # they can be compared with parsed ones
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class PostCrawl:
+    # Streams posts of a listing newest first, page by page.
+    #
+    # Pages are requested by page_cursor once the server returned a next_page cursor
+    # (Lemmy 0.19+), by page number otherwise. resume_token describes the position
+    # after the last post yielded and is JSON serializable, passing it to a new crawl
+    # with the same parameters continues from there.
+    # With `after`, the crawl ends at the first post published at or before it,
+    # except for featured posts, which are listed first regardless of their age.
+
+    def __init__(
+        self,
+        fetch_page: Callable[[dict[str, Any]], Awaitable[Any | None]],
+        *,
+        page_size: int,
+        after: datetime | None = None,
+        resume_token: dict[str, Any] | None = None,
+    ) -> None:
+        # fetch_page receives the pagination parameters for list_posts and returns
+        # the decoded page, or None if the listing isn't available
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+        self._after = as_utc(after) if after is not None else None
+
+        token = resume_token or {}
+        self._page: int = token.get("page", 1)
+        self._page_cursor: str | None = token.get("page_cursor")
+        self._offset: int = token.get("offset", 0)
+        self._done: bool = token.get("done", False)
+
+    @property
+    def resume_token(self) -> dict[str, Any]:
+        return {
+            "page": self._page,
+            "page_cursor": self._page_cursor,
+            "offset": self._offset,
+            "done": self._done,
+        }
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._crawl()
+
+    async def _crawl(self) -> AsyncIterator[Any]:
+        while not self._done:
+            params: dict[str, Any] = {"limit": self._page_size}
+            if self._page_cursor is not None:
+                params["page_cursor"] = self._page_cursor
+            else:
+                params["page"] = self._page
+
+            j = await self._fetch_page(params)
+            if j is None or len(j["posts"]) == 0:
+                logger.debug("received 0 posts")
+                self._done = True
+                return
+
+            posts = j["posts"]
+            for index in range(self._offset, len(posts)):
+                post = posts[index]
+                if self._after is not None:
+                    post_published = parse_published(post["post"]["published"])
+                    if post_published <= self._after:
+                        # community featured posts are listed at the top of the first page and may be older than desired
+                        if not post["post"]["featured_community"]:
+                            logger.debug(
+                                "breaking; post %s from %s is older than %s",
+                                post["post"]["ap_id"],
+                                post_published,
+                                self._after,
+                            )
+                            self._done = True
+                            return
+
+                        self._offset = index + 1
+                        continue
+
+                self._offset = index + 1
+                yield post
+
+            self._offset = 0
+            self._page += 1
+            if next_page := j.get("next_page"):
+                self._page_cursor = next_page
+            elif self._page_cursor is not None or len(posts) < self._page_size:
+                self._done = True
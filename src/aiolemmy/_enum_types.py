@@ -24,9 +24,45 @@ SortType = Literal[
     "Scaled",
 ]
 
+CommentSortType = Literal[
+    "Hot",
+    "Top",
+    "New",
+    "Old",
+    "Controversial",
+]
+
 ListingType = Literal[
     "All",
     "Local",
     "Subscribed",
     "ModeratorView",
 ]
+
+ModlogActionType = Literal[
+    "All",
+    "ModRemovePost",
+    "ModLockPost",
+    "ModFeaturePost",
+    "ModRemoveComment",
+    "ModRemoveCommunity",
+    "ModBanFromCommunity",
+    "ModAddCommunity",
+    "ModTransferCommunity",
+    "ModAdd",
+    "ModBan",
+    "ModHideCommunity",
+    "AdminPurgePerson",
+    "AdminPurgeCommunity",
+    "AdminPurgePost",
+    "AdminPurgeComment",
+]
+
+RateLimitType = Literal[
+    "message",
+    "post",
+    "register",
+    "image",
+    "comment",
+    "search",
+]
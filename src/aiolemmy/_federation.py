@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import functools
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from ._bulk import BulkResult, run_bulk
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, Iterable, Iterator, Mapping
+
+    from aiolemmy.lemmy import Lemmy
+
+# list membership flags, an instance may be part of more than one list
+_LINKED = 1
+_ALLOWED = 2
+_BLOCKED = 4
+
+_LIST_FLAGS = {"linked": _LINKED, "allowed": _ALLOWED, "blocked": _BLOCKED}
+
+
+@dataclass(frozen=True)
+class FederatedInstance:
+    id: int
+    domain: str
+    software: str | None
+    version: str | None
+    linked: bool
+    allowed: bool
+    blocked: bool
+
+
+@dataclass(frozen=True)
+class FederatedSnapshotDiff:
+    added: tuple[FederatedInstance, ...]
+    removed: tuple[FederatedInstance, ...]
+    # (before, after) for instances whose software or version changed
+    changed: tuple[tuple[FederatedInstance, FederatedInstance], ...]
+    # newly blocked instances, including added ones that are already blocked
+    blocked: tuple[FederatedInstance, ...]
+    unblocked: tuple[FederatedInstance, ...]
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.added
+            or self.removed
+            or self.changed
+            or self.blocked
+            or self.unblocked,
+        )
+
+
+class FederatedSnapshot:
+    # The instances known to a Lemmy instance, as returned by get_federated_instances()
+    # or iter_federated_instances(), indexed by id and domain.
+    #
+    # Fields are kept in columns with interned software names and versions instead of
+    # one dict per instance, FederatedInstance records are only created on access.
+    # Instance ids are specific to the instance the snapshot was taken from.
+
+    __slots__ = (
+        "_by_domain",
+        "_by_id",
+        "_domains",
+        "_flags",
+        "_ids",
+        "_software",
+        "_versions",
+    )
+
+    def __init__(self) -> None:
+        self._by_id: dict[int, int] = {}
+        self._by_domain: dict[str, int] = {}
+        self._ids = array("q")
+        self._domains: list[str] = []
+        self._software: list[str | None] = []
+        self._versions: list[str | None] = []
+        self._flags = bytearray()
+
+    def _add(self, list_name: str, instance: Mapping[str, Any]) -> None:
+        row = self._by_id.get(instance["id"])
+        if row is None:
+            row = len(self._ids)
+            self._by_id[instance["id"]] = row
+            self._by_domain[instance["domain"]] = row
+            self._ids.append(instance["id"])
+            self._domains.append(instance["domain"])
+            software = instance.get("software")
+            self._software.append(sys.intern(software) if software else software)
+            version = instance.get("version")
+            self._versions.append(sys.intern(version) if version else version)
+            self._flags.append(0)
+
+        self._flags[row] |= _LIST_FLAGS[list_name]
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[str, Mapping[str, Any]]]) -> Self:
+        # items as (list name, instance), like iter_federated_instances() yields them
+        self = cls()
+        for list_name, instance in items:
+            self._add(list_name, instance)
+        return self
+
+    @classmethod
+    async def from_stream(
+        cls,
+        items: AsyncIterable[tuple[str, Mapping[str, Any]]],
+    ) -> Self:
+        self = cls()
+        async for list_name, instance in items:
+            self._add(list_name, instance)
+        return self
+
+    @classmethod
+    def from_response(cls, response: Mapping[str, Any]) -> Self:
+        lists = response.get("federated_instances") or {}
+        return cls.from_items(
+            (list_name, instance)
+            for list_name in _LIST_FLAGS
+            for instance in lists.get(list_name) or ()
+        )
+
+    def _record(self, row: int) -> FederatedInstance:
+        flags = self._flags[row]
+        return FederatedInstance(
+            id=self._ids[row],
+            domain=self._domains[row],
+            software=self._software[row],
+            version=self._versions[row],
+            linked=bool(flags & _LINKED),
+            allowed=bool(flags & _ALLOWED),
+            blocked=bool(flags & _BLOCKED),
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._by_id or key in self._by_domain
+
+    def __iter__(self) -> Iterator[FederatedInstance]:
+        return map(self._record, range(len(self._ids)))
+
+    def get(self, instance_id: int) -> FederatedInstance | None:
+        row = self._by_id.get(instance_id)
+        return self._record(row) if row is not None else None
+
+    def by_domain(self, domain: str) -> FederatedInstance | None:
+        row = self._by_domain.get(domain)
+        return self._record(row) if row is not None else None
+
+    def diff(self, newer: FederatedSnapshot) -> FederatedSnapshotDiff:
+        # Compares by instance id, so both snapshots must be from the same instance
+        added = []
+        changed = []
+        blocked = []
+        unblocked = []
+
+        for new_row, id_ in enumerate(newer._ids):
+            row = self._by_id.get(id_)
+            if row is None:
+                record = newer._record(new_row)
+                added.append(record)
+                if record.blocked:
+                    blocked.append(record)
+                continue
+
+            if (
+                self._software[row] != newer._software[new_row]
+                or self._versions[row] != newer._versions[new_row]
+            ):
+                changed.append(
+                    (self._record(row), newer._record(new_row)),
+                )
+
+            was_blocked = self._flags[row] & _BLOCKED
+            is_blocked = newer._flags[new_row] & _BLOCKED
+            if is_blocked and not was_blocked:
+                blocked.append(newer._record(new_row))
+            elif was_blocked and not is_blocked:
+                unblocked.append(newer._record(new_row))
+
+        removed = [
+            self._record(row)
+            for row, id_ in enumerate(self._ids)
+            if id_ not in newer._by_id
+        ]
+
+        return FederatedSnapshotDiff(
+            added=tuple(added),
+            removed=tuple(removed),
+            changed=tuple(changed),
+            blocked=tuple(blocked),
+            unblocked=tuple(unblocked),
+        )
+
+
+async def block_instances(
+    lemmy: Lemmy,
+    instance_ids: Iterable[int],
+    *,
+    block: bool = True,
+    concurrency: int = 4,
+    max_per_second: float | None = None,
+) -> list[BulkResult[Any]]:
+    # Blocks (or unblocks) the instances via run_bulk, e.g. the ids of a
+    # FederatedSnapshotDiff's blocked instances. Ids must be those of the instance
+    # lemmy is connected to, use FederatedSnapshot.by_domain to map them otherwise.
+    return await run_bulk(
+        (
+            functools.partial(lemmy.block_instance, instance_id, block)
+            for instance_id in dict.fromkeys(instance_ids)
+        ),
+        concurrency=concurrency,
+        max_per_second=max_per_second,
+    )
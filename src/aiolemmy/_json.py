@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+JSONLoads = Callable[[bytes], Any]
+JSONDumps = Callable[[Any], "bytes | str"]
+
+
+def detect_json() -> tuple[JSONLoads, JSONDumps]:
+    # Prefers faster third party implementations if they are installed
+    try:
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        pass
+    else:
+        logger.debug("Using orjson for JSON")
+        return orjson.loads, orjson.dumps
+
+    try:
+        import msgspec.json  # noqa: PLC0415
+    except ImportError:
+        pass
+    else:
+        logger.debug("Using msgspec for JSON")
+        return msgspec.json.decode, msgspec.json.encode
+
+    return json.loads, functools.partial(json.dumps, separators=(",", ":"))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Iterable
+
+# Incremental extraction of array items from a JSON document that is read in chunks.
+#
+# Only the objects leading to the requested arrays are walked structurally, every
+# other value, including each array item, is decoded on its own with
+# json.JSONDecoder.raw_decode once it has been received completely. This keeps
+# memory bounded by the largest single item instead of the whole document.
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = f"{_WHITESPACE},]}}"
+
+_skip_whitespace = re.compile(f"[{_WHITESPACE}]*").match
+
+_decoder = json.JSONDecoder()
+
+
+class _Incomplete(Exception):  # noqa: N818
+    pass
+
+
+class _Frame:
+    __slots__ = ("array", "key", "path", "state")
+
+    def __init__(self, path: tuple[str, ...], *, array: bool) -> None:
+        self.path = path
+        self.array = array
+        # objects: first, key, colon, value, next; arrays: first, value, next
+        self.state = "first"
+        self.key = ""
+
+
+class ArrayItemParser:
+    def __init__(self, paths: Iterable[tuple[str, ...]]) -> None:
+        self._paths = frozenset(paths)
+        self._prefixes = frozenset(
+            path[:i] for path in self._paths for i in range(len(path))
+        )
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._done = False
+        self._eof = False
+
+    def feed(self, data: bytes) -> list[tuple[tuple[str, ...], Any]]:
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(data)
+        self._pos = 0
+        return self._parse()
+
+    def close(self) -> list[tuple[tuple[str, ...], Any]]:
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        items = self._parse()
+        if not self._done or self._buffer[self._pos :].strip(_WHITESPACE):
+            msg = "incomplete JSON document"
+            raise ValueError(msg)
+        return items
+
+    def _skip_whitespace(self) -> bool:
+        self._pos = _skip_whitespace(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode(self) -> Any:
+        # Decodes the value at the current position, raising _Incomplete if more data
+        # is required to do so.
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _Incomplete from None
+
+        # numbers may continue in the next chunk, e.g. "1" of "1.5", so they are only
+        # complete once followed by a delimiter
+        if (
+            not self._eof
+            and not isinstance(value, (dict, list, str))
+            and (end == len(self._buffer) or self._buffer[end] not in _DELIMITERS)
+        ):
+            raise _Incomplete
+
+        self._pos = end
+        return value
+
+    def _value(self, path: tuple[str, ...]) -> None:
+        char = self._buffer[self._pos]
+        if char == "[" and path in self._paths:
+            self._pos += 1
+            self._stack.append(_Frame(path, array=True))
+        elif char == "{" and path in self._prefixes:
+            self._pos += 1
+            self._stack.append(_Frame(path, array=False))
+        else:
+            # e.g. null instead of the object or an unrelated value
+            self._decode()
+            self._completed()
+
+    def _completed(self) -> None:
+        if self._stack:
+            self._stack[-1].state = "next"
+        else:
+            self._done = True
+
+    def _array_items(
+        self,
+        frame: _Frame,
+        items: list[tuple[tuple[str, ...], Any]],
+    ) -> None:
+        # Fast path for consecutive items, which make up most of the document
+        path = frame.path
+        buffer = self._buffer
+        while True:
+            items.append((path, self._decode()))
+            frame.state = "next"
+
+            pos = _skip_whitespace(buffer, self._pos).end()
+            if buffer.startswith(",", pos):
+                self._pos = _skip_whitespace(buffer, pos + 1).end()
+                frame.state = "value"
+                if self._pos == len(buffer):
+                    return
+            else:
+                self._pos = pos
+                return
+
+    def _parse(self) -> list[tuple[tuple[str, ...], Any]]:
+        items: list[tuple[tuple[str, ...], Any]] = []
+        try:
+            while not self._done and self._skip_whitespace():
+                self._step(items)
+        except _Incomplete:
+            pass
+        return items
+
+    def _step(self, items: list[tuple[tuple[str, ...], Any]]) -> None:
+        if not self._stack:
+            self._value(())
+            return
+
+        frame = self._stack[-1]
+        char = self._buffer[self._pos]
+
+        if frame.state == "first":
+            if char == ("]" if frame.array else "}"):
+                self._pos += 1
+                self._stack.pop()
+                self._completed()
+                return
+            frame.state = "value" if frame.array else "key"
+
+        if frame.state == "next":
+            if char == ",":
+                self._pos += 1
+                frame.state = "value" if frame.array else "key"
+                return
+            if char == ("]" if frame.array else "}"):
+                self._pos += 1
+                self._stack.pop()
+                self._completed()
+                return
+            msg = f"unexpected {char!r} at {frame.path}"
+            raise ValueError(msg)
+
+        if frame.state == "key":
+            frame.key = self._decode()
+            frame.state = "colon"
+        elif frame.state == "colon":
+            if char != ":":
+                msg = f"expected ':' after {frame.key!r} at {frame.path}"
+                raise ValueError(msg)
+            self._pos += 1
+            frame.state = "value"
+        elif frame.array:
+            self._array_items(frame, items)
+        else:
+            self._value((*frame.path, frame.key))
+
+
+async def iter_array_items(
+    chunks: AsyncIterable[bytes],
+    paths: Iterable[tuple[str, ...]],
+) -> AsyncIterator[tuple[tuple[str, ...], Any]]:
+    # Yields (path, item) for the items of the arrays at the given key paths
+    parser = ArrayItemParser(paths)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+
+    for item in parser.close():
+        yield item
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+
+@dataclass(frozen=True)
+class RequestMetrics:
+    # endpoint path, e.g. /api/v3/modlog
+    endpoint: str
+    method: str
+    # None if no response was received
+    status: int | None
+    # seconds from the first attempt until the body was received, including retries
+    latency: float
+    response_size: int | None
+    retries: int
+    page: int | None
+
+
+class MetricsSink(Protocol):
+    # Called once per request after it completed or failed, must not block
+    def record(self, metrics: RequestMetrics) -> None: ...
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    # nearest-rank method
+    rank = math.ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank - 1, 0)]
+
+
+class _EndpointStats:
+    __slots__ = ("bytes", "count", "errors", "latencies", "pages", "retries")
+
+    def __init__(self, max_samples: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.pages = 0
+        self.latencies: deque[float] = deque(maxlen=max_samples)
+
+
+class HistogramAggregator:
+    # Aggregates request metrics per method and endpoint in process.
+    # Latency percentiles are computed over the most recent max_samples requests.
+
+    def __init__(self, max_samples: int = 10_000) -> None:
+        self._max_samples = max_samples
+        self._stats: dict[str, _EndpointStats] = {}
+
+    def record(self, metrics: RequestMetrics) -> None:
+        key = f"{metrics.method} {metrics.endpoint}"
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _EndpointStats(self._max_samples)
+
+        stats.count += 1
+        stats.retries += metrics.retries
+        stats.latencies.append(metrics.latency)
+        if metrics.status is None or metrics.status >= 400:  # noqa: PLR2004
+            stats.errors += 1
+        if metrics.response_size is not None:
+            stats.bytes += metrics.response_size
+        if metrics.page is not None:
+            stats.pages = max(stats.pages, metrics.page)
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        summary = {}
+        for key, stats in sorted(self._stats.items()):
+            latencies = sorted(stats.latencies)
+            summary[key] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "retries": stats.retries,
+                "bytes": stats.bytes,
+                "max_page": stats.pages,
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+            }
+
+        return summary
+
+    def dump(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def reset(self) -> None:
+        self._stats.clear()
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Any, ClassVar, Generic, TypeVar, overload
+
+from aiolemmy import _typed_dicts
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+# Optional typed models for response objects.
+#
+# Models only keep the fields known from _typed_dicts in __slots__, which avoids the
+# per-object dict that dominates memory usage when holding many views.
+# Nested objects of views are kept as they were received and only decoded into models
+# on first access, so views of which only a few attributes are read stay cheap.
+# Fields that are unknown to this version of aiolemmy are kept in `extra`.
+
+M = TypeVar("M", bound="Model")
+
+_MISSING: Any = object()
+
+
+def _slots(typed_dict: type, lazy: tuple[str, ...] = ()) -> tuple[str, ...]:
+    return (
+        *(f"_{key}" if key in lazy else key for key in typed_dict.__annotations__),
+        "extra",
+    )
+
+
+class Model:
+    __slots__ = ()
+
+    # response keys mapped to the slot holding their value
+    _keys: ClassVar[dict[str, str]]
+
+    extra: dict[str, Any] | None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._keys = {
+            slot.removeprefix("_"): slot for slot in cls.__slots__ if slot != "extra"
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Self:
+        self = cls.__new__(cls)
+
+        found = 0
+        for key, slot in cls._keys.items():
+            value = data.get(key, _MISSING)
+            if value is _MISSING:
+                value = None
+            else:
+                found += 1
+            setattr(self, slot, value)
+
+        self.extra = (
+            {k: v for k, v in data.items() if k not in cls._keys}
+            if found != len(data)
+            else None
+        )
+
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        # fields missing from the response are included as None
+        d: dict[str, Any] = {}
+        for key, slot in self._keys.items():
+            value = getattr(self, slot)
+            d[key] = value.to_dict() if isinstance(value, Model) else value
+
+        if self.extra is not None:
+            d.update(self.extra)
+
+        return d
+
+    def __repr__(self) -> str:
+        id_ = getattr(self, "id", None)
+        if id_ is not None:
+            return f"<{type(self).__name__} id={id_}>"
+
+        return f"<{type(self).__name__}>"
+
+
+class _Lazy(Generic[M]):
+    # Exposes the underscore-prefixed slot of the same name, decoding the raw dict
+    # into the model on first access.
+
+    def __init__(self, model: type[M]) -> None:
+        self._model = model
+        self._slot = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._slot = f"_{name}"
+
+    @overload
+    def __get__(self, instance: None, owner: type | None = None) -> Self: ...
+
+    @overload
+    def __get__(self, instance: object, owner: type | None = None) -> M: ...
+
+    def __get__(self, instance: object | None, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+
+        value = getattr(instance, self._slot)
+        if isinstance(value, dict):
+            value = self._model.from_dict(value)
+            setattr(instance, self._slot, value)
+
+        return value
+
+
+class Person(Model):
+    __slots__ = _slots(_typed_dicts.Person)
+
+
+class PersonAggregates(Model):
+    __slots__ = _slots(_typed_dicts.PersonAggregates)
+
+
+class Community(Model):
+    __slots__ = _slots(_typed_dicts.Community)
+
+
+class Post(Model):
+    __slots__ = _slots(_typed_dicts.Post)
+
+
+class PostAggregates(Model):
+    __slots__ = _slots(_typed_dicts.PostAggregates)
+
+
+class Comment(Model):
+    __slots__ = _slots(_typed_dicts.Comment)
+
+
+class CommentAggregates(Model):
+    __slots__ = _slots(_typed_dicts.CommentAggregates)
+
+
+class PrivateMessage(Model):
+    __slots__ = _slots(_typed_dicts.PrivateMessage)
+
+
+class CommentReport(Model):
+    __slots__ = _slots(_typed_dicts.CommentReport)
+
+
+class PostReport(Model):
+    __slots__ = _slots(_typed_dicts.PostReport)
+
+
+class PrivateMessageReport(Model):
+    __slots__ = _slots(_typed_dicts.PrivateMessageReport)
+
+
+class PersonView(Model):
+    __slots__ = _slots(_typed_dicts.PersonView, lazy=("person", "counts"))
+
+    person = _Lazy(Person)
+    counts = _Lazy(PersonAggregates)
+
+
+class PostView(Model):
+    __slots__ = _slots(
+        _typed_dicts.PostView,
+        lazy=("post", "creator", "community", "counts"),
+    )
+
+    post = _Lazy(Post)
+    creator = _Lazy(Person)
+    community = _Lazy(Community)
+    counts = _Lazy(PostAggregates)
+
+
+class CommentView(Model):
+    __slots__ = _slots(
+        _typed_dicts.CommentView,
+        lazy=("comment", "creator", "post", "community", "counts"),
+    )
+
+    comment = _Lazy(Comment)
+    creator = _Lazy(Person)
+    post = _Lazy(Post)
+    community = _Lazy(Community)
+    counts = _Lazy(CommentAggregates)
+
+
+class CommentReportView(Model):
+    __slots__ = _slots(
+        _typed_dicts.CommentReportView,
+        lazy=(
+            "comment_report",
+            "comment",
+            "post",
+            "community",
+            "creator",
+            "comment_creator",
+            "counts",
+            "resolver",
+        ),
+    )
+
+    comment_report = _Lazy(CommentReport)
+    comment = _Lazy(Comment)
+    post = _Lazy(Post)
+    community = _Lazy(Community)
+    creator = _Lazy(Person)
+    comment_creator = _Lazy(Person)
+    counts = _Lazy(CommentAggregates)
+    resolver = _Lazy(Person)
+
+
+class PostReportView(Model):
+    __slots__ = _slots(
+        _typed_dicts.PostReportView,
+        lazy=(
+            "post_report",
+            "post",
+            "community",
+            "creator",
+            "post_creator",
+            "counts",
+            "resolver",
+        ),
+    )
+
+    post_report = _Lazy(PostReport)
+    post = _Lazy(Post)
+    community = _Lazy(Community)
+    creator = _Lazy(Person)
+    post_creator = _Lazy(Person)
+    counts = _Lazy(PostAggregates)
+    resolver = _Lazy(Person)
+
+
+class PrivateMessageReportView(Model):
+    __slots__ = _slots(
+        _typed_dicts.PrivateMessageReportView,
+        lazy=(
+            "private_message_report",
+            "private_message",
+            "private_message_creator",
+            "creator",
+            "resolver",
+        ),
+    )
+
+    private_message_report = _Lazy(PrivateMessageReport)
+    private_message = _Lazy(PrivateMessage)
+    private_message_creator = _Lazy(Person)
+    creator = _Lazy(Person)
+    resolver = _Lazy(Person)
+
+
+class ModlogRecord:
+    # Modlog records differ by type, the action itself (e.g. mod_remove_post) is kept
+    # as received, while the objects it refers to are decoded lazily.
+    # Persons other than the moderator are exposed as `person`, e.g. the banned person.
+    __slots__ = (
+        "_comment",
+        "_community",
+        "_moderator",
+        "_person",
+        "_post",
+        "action",
+        "action_key",
+        "extra",
+        "moderator_key",
+        "person_key",
+        "type_",
+    )
+
+    _moderator_keys: ClassVar[tuple[str, ...]] = ("moderator", "admin")
+    _person_keys: ClassVar[tuple[str, ...]] = (
+        "banned_person",
+        "modded_person",
+        "commenter",
+    )
+
+    _person_slots: ClassVar[tuple[str, ...]] = ("_moderator", "_person")
+
+    moderator = _Lazy(Person)
+    person = _Lazy(Person)
+    community = _Lazy(Community)
+    post = _Lazy(Post)
+    comment = _Lazy(Comment)
+
+    @classmethod
+    def from_record(cls, type_: str, action_key: str, data: Mapping[str, Any]) -> Self:
+        # type_ and action_key as in MODLOG_TYPES, e.g. "removed_posts", "mod_remove_post"
+        self = cls.__new__(cls)
+        self.type_ = type_
+        self.action_key = action_key
+        self.action = data[action_key]
+        self.moderator_key = next(
+            (key for key in cls._moderator_keys if key in data),
+            None,
+        )
+        self._moderator = data[self.moderator_key] if self.moderator_key else None
+        self.person_key = next((key for key in cls._person_keys if key in data), None)
+        self._person = data[self.person_key] if self.person_key else None
+        self._community = data.get("community")
+        self._post = data.get("post")
+        self._comment = data.get("comment")
+
+        known = {
+            action_key,
+            "community",
+            "post",
+            "comment",
+            *cls._moderator_keys,
+            *cls._person_keys,
+        }
+        self.extra = {k: v for k, v in data.items() if k not in known} or None
+
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        d: dict[str, Any] = {self.action_key: self.action}
+        for key, slot in (
+            (self.moderator_key, "_moderator"),
+            (self.person_key, "_person"),
+            ("community", "_community"),
+            ("post", "_post"),
+            ("comment", "_comment"),
+        ):
+            value = getattr(self, slot)
+            # the referenced objects are only present for some types of records
+            if key is None or (value is None and slot not in self._person_slots):
+                continue
+            d[key] = value.to_dict() if isinstance(value, Model) else value
+
+        if self.extra is not None:
+            d.update(self.extra)
+
+        return d
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.type_} id={self.action.get('id')}>"
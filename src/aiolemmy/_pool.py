@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import urllib.parse
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from ._connection import ConnectionConfig
+from ._rate_limit import RateLimiter
+from .lemmy import Lemmy
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+    from types import TracebackType
+
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FanOutResult:
+    instance_base_url: str
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class LemmyPool:
+    # Manages Lemmy clients for many instances on a single aiohttp session.
+    #
+    # concurrency caps the number of method calls in flight across all instances,
+    # per_host the number per instance. The connector is limited to the same numbers,
+    # so the number of open sockets stays bounded by them.
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 64,
+        per_host: int = 4,
+        rate_limit: bool = False,
+        **lemmy_kwargs: Any,
+    ) -> None:
+        self._concurrency = concurrency
+        self._per_host = per_host
+        self._rate_limit = rate_limit
+        # passed on to every Lemmy client, e.g. user_agent or retry_policy
+        self._lemmy_kwargs = lemmy_kwargs
+
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._rate_limiters: dict[str, RateLimiter] = {}
+        self._clients: dict[str, Lemmy] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._clients.clear()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = ConnectionConfig(
+                limit=self._concurrency,
+                limit_per_host=self._per_host,
+            ).create_session()
+
+        return self._session
+
+    def client(self, instance_base_url: str) -> Lemmy:
+        instance_base_url = instance_base_url.removesuffix("/")
+        lemmy = self._clients.get(instance_base_url)
+        if lemmy is None:
+            kwargs = dict(self._lemmy_kwargs)
+            if self._rate_limit:
+                # Lemmy applies rate limits per client IP, so clients for the same host
+                # have to share them
+                host = self._host(instance_base_url)
+                kwargs["rate_limiter"] = self._rate_limiters.setdefault(
+                    host,
+                    RateLimiter(),
+                )
+
+            lemmy = Lemmy(self._get_session(), instance_base_url, **kwargs)
+            self._clients[instance_base_url] = lemmy
+
+        return lemmy
+
+    @staticmethod
+    def _host(instance_base_url: str) -> str:
+        return urllib.parse.urlsplit(instance_base_url).hostname or instance_base_url
+
+    async def _call(
+        self,
+        instance_base_url: str,
+        method: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        timeout: float | None,
+    ) -> FanOutResult:
+        host = self._host(instance_base_url)
+        host_semaphore = self._host_semaphores.setdefault(
+            host,
+            asyncio.Semaphore(self._per_host),
+        )
+
+        # the host slot is taken first, so calls waiting for a busy host don't hold
+        # global slots that calls to other hosts could use
+        async with host_semaphore, self._semaphore:
+            coro = getattr(self.client(instance_base_url), method)(*args, **kwargs)
+            try:
+                result = await asyncio.wait_for(coro, timeout)
+            except Exception as e:  # noqa: BLE001
+                logger.debug("%s on %s failed: %r", method, instance_base_url, e)
+                return FanOutResult(instance_base_url, error=e)
+
+        return FanOutResult(instance_base_url, result=result)
+
+    async def fan_out(
+        self,
+        method: str,
+        instance_base_urls: Iterable[str],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[FanOutResult]:
+        # Calls the Lemmy method with the same arguments for every instance and yields
+        # the results as they complete. Errors and timeouts are returned as results.
+        # Closing the iterator early cancels the remaining calls.
+        tasks = [
+            asyncio.create_task(self._call(url, method, args, kwargs, timeout))
+            for url in dict.fromkeys(
+                url.removesuffix("/") for url in instance_base_urls
+            )
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
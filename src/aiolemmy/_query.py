@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class QueryEncoder:
+    # Encodes the arguments of a list method into query parameters in a single pass,
+    # leaving out None values and encoding bools the way Lemmy expects them.
+    # Values are passed positionally, in the order of the fields.
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, *fields: str) -> None:
+        self._fields = fields
+
+    def encode(self, *values: Any) -> dict[str, Any]:
+        return {
+            field: ("true" if value else "false") if value.__class__ is bool else value
+            for field, value in zip(self._fields, values, strict=True)
+            if value is not None
+        }
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from aiolemmy._enum_types import RateLimitType
+
+logger = logging.getLogger(__name__)
+
+# Lemmy's defaults for LocalSiteRateLimit as (requests, per seconds), used until the
+# limiter has been seeded from the instance's site response
+DEFAULT_RATE_LIMITS: dict[RateLimitType, tuple[int, int]] = {
+    "message": (180, 60),
+    "post": (6, 600),
+    "register": (10, 3600),
+    "image": (6, 3600),
+    "comment": (6, 600),
+    "search": (60, 600),
+}
+
+# (method, path) combinations that Lemmy doesn't count towards the message bucket
+# https://github.com/LemmyNet/lemmy/blob/0.19.3/src/api_routes_http.rs
+ENDPOINT_RATE_LIMIT_TYPES: dict[tuple[str, str], RateLimitType] = {
+    ("post", "/api/v3/post"): "post",
+    ("get", "/api/v3/user/get_captcha"): "post",
+    ("post", "/api/v3/comment"): "comment",
+    ("post", "/api/v3/user/register"): "register",
+    ("post", "/api/v3/community"): "register",
+    ("get", "/api/v3/search"): "search",
+    ("post", "/pictrs/image"): "image",
+}
+
+
+def rate_limit_type(method: str, path: str) -> RateLimitType:
+    return ENDPOINT_RATE_LIMIT_TYPES.get((method.lower(), path), "message")
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float) -> None:
+        self._lock = asyncio.Lock()
+        self._capacity = 1.0
+        self._rate = 1.0
+        self.configure(capacity, per_seconds)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    def configure(self, capacity: float, per_seconds: float) -> None:
+        # at least one request has to fit into the bucket, otherwise acquire would never return
+        self._capacity = max(capacity, 1.0)
+        self._rate = self._capacity / max(per_seconds, 1e-9)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated) * self._rate,
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # the lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+
+            self._tokens -= 1
+
+
+# A single RateLimiter can be shared by multiple Lemmy clients for the same host,
+# as Lemmy applies its limits per client IP.
+class RateLimiter:
+    def __init__(
+        self,
+        rate_limits: Mapping[str, int] | None = None,
+        *,
+        headroom: float = 0.9,
+    ) -> None:
+        if not 0 < headroom <= 1:
+            raise ValueError("headroom must be within (0, 1]")
+
+        self._headroom = headroom
+        self._buckets: dict[RateLimitType, TokenBucket] = {
+            type_: TokenBucket(requests * headroom, per_seconds)
+            for type_, (requests, per_seconds) in DEFAULT_RATE_LIMITS.items()
+        }
+
+        if rate_limits is not None:
+            self.update(rate_limits)
+
+    def update(self, rate_limits: Mapping[str, int]) -> None:
+        # uses the format of LocalSiteRateLimit, e.g. {"message": 180, "message_per_second": 60}
+        for type_, bucket in self._buckets.items():
+            requests = rate_limits.get(type_)
+            per_seconds = rate_limits.get(f"{type_}_per_second")
+            if requests is None or per_seconds is None:
+                continue
+
+            logger.debug(
+                "Setting %s rate limit to %s requests per %s seconds",
+                type_,
+                requests,
+                per_seconds,
+            )
+            bucket.configure(requests * self._headroom, per_seconds)
+
+    def update_from_site(self, site: Any) -> None:
+        rate_limits = site.get("site_view", {}).get("local_site_rate_limit")
+        if rate_limits is None:
+            logger.warning("site response did not contain rate limits")
+            return
+
+        self.update(rate_limits)
+
+    async def acquire(self, method: str, path: str) -> None:
+        await self._buckets[rate_limit_type(method, path)].acquire()
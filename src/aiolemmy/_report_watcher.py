@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+import aiohttp
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+    from types import TracebackType
+
+    from aiolemmy.lemmy import Lemmy
+
+logger = logging.getLogger(__name__)
+
+ReportType = Literal["comment", "post", "private_message"]
+ReportChange = Literal["new", "changed", "resolved"]
+
+REPORT_TYPES: tuple[ReportType, ...] = ("comment", "post", "private_message")
+
+
+@dataclass(frozen=True)
+class ReportEvent:
+    report_type: ReportType
+    report_id: int
+    change: ReportChange
+    # for resolved reports this is the last version seen while it was unresolved
+    report: Any
+
+
+class ReportWatcher:
+    # Polls the unresolved report queues and yields new, changed and resolved reports.
+    #
+    # The polling interval is shortened after polls that found changes and stretched
+    # after idle polls, within [min_interval, max_interval].
+    # Iteration ends after stop() was called, leaving the `async with` block or
+    # closing the iterator.
+    # Each report type is diffed on its own, a type whose queue couldn't be fetched
+    # keeps its last known state until the next poll. Listing private message reports
+    # requires admin rights, moderators should leave them out of report_types.
+
+    def __init__(
+        self,
+        lemmy: Lemmy,
+        *,
+        report_types: Iterable[ReportType] = REPORT_TYPES,
+        min_interval: float = 5.0,
+        max_interval: float = 300.0,
+        speedup: float = 0.5,
+        slowdown: float = 1.5,
+        emit_existing: bool = True,
+        prefetch: int = 0,
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+
+        self._lemmy = lemmy
+        self._report_types = tuple(report_types)
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._speedup = speedup
+        self._slowdown = slowdown
+        self._emit_existing = emit_existing
+        self._prefetch = prefetch
+
+        self.interval = min_interval
+        self._stopped = asyncio.Event()
+
+        # report type -> report id -> (state used for diffing, report), types are only
+        # present once they have been fetched successfully
+        self._known: dict[ReportType, dict[int, tuple[tuple[Any, ...], Any]]] = {}
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def __aiter__(self) -> AsyncIterator[ReportEvent]:
+        return self._watch()
+
+    async def _fetch(self, report_type: ReportType) -> dict[int, Any]:
+        lister = {
+            "comment": self._lemmy.get_comment_reports,
+            "post": self._lemmy.get_post_reports,
+            "private_message": self._lemmy.get_private_message_reports,
+        }[report_type]
+
+        return await lister(unresolved_only=True, limit=None, prefetch=self._prefetch)
+
+    @staticmethod
+    def _state(report_type: ReportType, report: Any) -> tuple[Any, ...]:
+        inner = report[f"{report_type}_report"]
+        return (inner["resolved"], inner.get("updated"), inner.get("reason"))
+
+    def _diff(
+        self,
+        report_type: ReportType,
+        reports: dict[int, Any],
+        *,
+        initial: bool,
+    ) -> list[ReportEvent]:
+        events = []
+        known = self._known.get(report_type)
+        # without a previous state for this type, all reports are existing ones
+        initial = initial or known is None
+        known = known or {}
+
+        current = {
+            report_id: (self._state(report_type, report), report)
+            for report_id, report in reports.items()
+        }
+
+        for report_id, (state, report) in current.items():
+            previous = known.get(report_id)
+            if previous is None:
+                if not initial or self._emit_existing:
+                    events.append(ReportEvent(report_type, report_id, "new", report))
+            elif previous[0] != state:
+                events.append(ReportEvent(report_type, report_id, "changed", report))
+
+        for report_id, (_, report) in known.items():
+            if report_id not in current:
+                events.append(
+                    ReportEvent(report_type, report_id, "resolved", report),
+                )
+
+        self._known[report_type] = current
+
+        return events
+
+    async def poll(self, *, initial: bool = False) -> list[ReportEvent]:
+        # Raises the first error only if no report type could be fetched.
+        results = await asyncio.gather(
+            *(self._fetch(report_type) for report_type in self._report_types),
+            return_exceptions=True,
+        )
+
+        events = []
+        errors = []
+        for report_type, result in zip(self._report_types, results, strict=True):
+            if isinstance(result, (aiohttp.ClientError, asyncio.TimeoutError)):
+                logger.warning("Failed to fetch %s reports: %r", report_type, result)
+                errors.append(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                events.extend(self._diff(report_type, result, initial=initial))
+
+        if errors and len(errors) == len(results):
+            raise errors[0]
+
+        return events
+
+    async def _watch(self) -> AsyncIterator[ReportEvent]:
+        initial = True
+        while not self._stopped.is_set():
+            try:
+                events = await self.poll(initial=initial)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Failed to poll reports: %r", e)
+                events = None
+            else:
+                initial = False
+
+            if events:
+                self.interval = max(self._min_interval, self.interval * self._speedup)
+            else:
+                self.interval = min(self._max_interval, self.interval * self._slowdown)
+
+            logger.debug(
+                "Found %s report changes, next poll in %.1fs",
+                len(events) if events is not None else 0,
+                self.interval,
+            )
+
+            for event in events or ():
+                yield event
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.interval)
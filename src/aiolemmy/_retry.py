@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import email.utils
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+IDEMPOTENT_METHODS = frozenset({"get", "head", "options", "put", "delete"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if value is None:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    # total number of attempts, including the first one
+    max_attempts: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    # fraction of the backoff that is randomized, 1.0 is "full jitter"
+    jitter: float = 1.0
+    # upper bound for the time spent on a request including all retries
+    max_retry_time: float | None = 60.0
+    statuses: frozenset[int] = RETRY_STATUSES
+    # lowercase HTTP methods, only idempotent ones are retried by default
+    methods: frozenset[str] = IDEMPOTENT_METHODS
+    respect_retry_after: bool = True
+
+    def allows(self, method: str) -> bool:
+        return method.lower() in self.methods
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())  # noqa: S311
+
+    def retry_delay(
+        self,
+        attempt: int,
+        elapsed: float,
+        retry_after: str | None = None,
+    ) -> float | None:
+        # Returns how long to wait before the next attempt, or None if the request
+        # should not be retried anymore. attempt is the number of the failed attempt.
+        if attempt >= self.max_attempts:
+            return None
+
+        delay = None
+        if self.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        if self.max_retry_time is not None and elapsed + delay > self.max_retry_time:
+            return None
+
+        return delay
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[Any]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key into a single execution.
+    #
+    # All callers receive the same result object, so it must not be modified.
+    # Cancelling a caller only cancels the shared execution once no other
+    # caller is waiting for it anymore.
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+
+            async def run() -> Any:
+                return await factory()
+
+            flight = _Flight(asyncio.create_task(run()))
+            self._flights[key] = flight
+
+            def done(_: asyncio.Task[Any]) -> None:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+            flight.task.add_done_callback(done)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # removed right away, so callers arriving before the task has finished
+                # cancelling start a new flight instead of joining this one
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import sys
+import time
+from http import HTTPStatus
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import AsyncIterator, Mapping
+    from types import TracebackType
+
+# Transports perform the HTTP requests for Lemmy._request, which allows recording
+# responses to a cassette and replaying them later without network access.
+#
+# Recorded and replayed responses provide the same interface, including streaming the
+# body from r.content, so methods run unchanged against a cassette.
+#
+# Cassettes are gzip compressed JSON lines, one request/response pair per line.
+# Request headers and cookies are not recorded and tokens in responses, e.g. of
+# /user/login, are replaced, so cassettes don't contain credentials that can be used.
+# Request bodies only end up in a truncated hash, which still allows guessing weak
+# login passwords, so cassettes of logins shouldn't be shared.
+
+# not replayed, as the recorded body has already been decoded
+_SKIPPED_HEADERS = frozenset(
+    ("content-encoding", "content-length", "set-cookie", "transfer-encoding"),
+)
+
+# replaces tokens in recorded responses
+_REDACTED_JWT = "redacted"
+
+
+def _redact(text: str) -> str:
+    if '"jwt"' not in text:
+        return text
+
+    try:
+        j = json.loads(text)
+    except ValueError:
+        return text
+
+    if not isinstance(j, dict) or j.get("jwt") is None:
+        return text
+
+    return json.dumps(j | {"jwt": _REDACTED_JWT}, separators=(",", ":"))
+
+
+class ResponseContent(Protocol):
+    def iter_chunked(self, n: int) -> AsyncIterator[bytes]: ...
+
+    def iter_any(self) -> AsyncIterator[bytes]: ...
+
+    async def read(self, n: int = -1) -> bytes: ...
+
+
+class Response(Protocol):
+    # The parts of aiohttp.ClientResponse used by aiolemmy
+
+    @property
+    def status(self) -> int: ...
+
+    @property
+    def reason(self) -> str | None: ...
+
+    @property
+    def ok(self) -> bool: ...
+
+    @property
+    def headers(self) -> CIMultiDictProxy[str]: ...
+
+    @property
+    def content_type(self) -> str: ...
+
+    @property
+    def content_length(self) -> int | None: ...
+
+    @property
+    def content(self) -> ResponseContent: ...
+
+    @property
+    def request_info(self) -> aiohttp.RequestInfo: ...
+
+    @property
+    def history(self) -> tuple[Any, ...]: ...
+
+    async def read(self) -> bytes: ...
+
+    async def text(self, encoding: str | None = None) -> str: ...
+
+    async def json(self, *, content_type: str | None = "application/json") -> Any: ...
+
+    def raise_for_status(self) -> None: ...
+
+    def release(self) -> Any: ...
+
+
+class Transport(abc.ABC):
+    @abc.abstractmethod
+    async def request(
+        self,
+        method: str,
+        url: str | URL,
+        **kwargs: Any,
+    ) -> Response: ...
+
+
+class AiohttpTransport(Transport):
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        self._session = session
+
+    async def request(
+        self,
+        method: str,
+        url: str | URL,
+        **kwargs: Any,
+    ) -> Response:
+        return await self._session.request(
+            method,
+            url,
+            raise_for_status=False,
+            **kwargs,
+        )
+
+
+def _request_key(method: str, url: str | URL, kwargs: Mapping[str, Any]) -> str:
+    params = kwargs.get("params")
+    if params:
+        url = str(URL(url).update_query(sorted((k, str(v)) for k, v in params.items())))
+
+    key = f"{method.upper()} {url}"
+
+    data = kwargs.get("data")
+    if data is not None:
+        if isinstance(data, str):
+            data = data.encode()
+        key += f" {hashlib.sha256(data).hexdigest()[:16]}"
+
+    return key
+
+
+class RecordingTransport(Transport):
+    # Passes requests on to another transport and appends them to a cassette.
+    # Connection errors and timeouts are recorded as well, so retries can be replayed.
+
+    def __init__(self, transport: Transport, path: str | os.PathLike[str]) -> None:
+        self._transport = transport
+        self._file = gzip.open(Path(path), "at", encoding="utf-8")  # noqa: SIM115
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, separators=(",", ":")))
+        self._file.write("\n")
+
+    async def request(
+        self,
+        method: str,
+        url: str | URL,
+        **kwargs: Any,
+    ) -> Response:
+        entry: dict[str, Any] = {"key": _request_key(method, url, kwargs)}
+
+        started = time.monotonic()
+        try:
+            r = await self._transport.request(method, url, **kwargs)
+            body = await r.read()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            entry["elapsed"] = round(time.monotonic() - started, 4)
+            entry["error"] = (
+                "timeout" if isinstance(e, asyncio.TimeoutError) else repr(e)
+            )
+            self._write(entry)
+            raise
+
+        entry["elapsed"] = round(time.monotonic() - started, 4)
+        entry["status"] = r.status
+        entry["reason"] = r.reason
+        entry["headers"] = [
+            (k, v) for k, v in r.headers.items() if k.lower() not in _SKIPPED_HEADERS
+        ]
+        try:
+            entry["text"] = _redact(body.decode())
+        except UnicodeDecodeError:
+            entry["base64"] = base64.b64encode(body).decode()
+
+        self._write(entry)
+        r.release()
+
+        # Reading the body drained r.content, so the caller gets the recorded response,
+        # which can be streamed like it will be when replayed, but with the unredacted
+        # body.
+        return ReplayResponse(
+            method,
+            str(url),
+            status=entry["status"],
+            reason=entry["reason"],
+            headers=CIMultiDict(entry["headers"]),
+            body=body,
+        )
+
+
+class _ReplayContent:
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+        self._offset = 0
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        while chunk := await self.read(n):
+            yield chunk
+
+    async def iter_any(self) -> AsyncIterator[bytes]:
+        while chunk := await self.read():
+            yield chunk
+
+    async def read(self, n: int = -1) -> bytes:
+        end = len(self._body) if n < 0 else self._offset + n
+        chunk = self._body[self._offset : end]
+        self._offset += len(chunk)
+        return chunk
+
+
+class ReplayResponse:
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        *,
+        status: int,
+        reason: str | None,
+        headers: CIMultiDict[str],
+        body: bytes,
+    ) -> None:
+        self.method = method.upper()
+        self.url = URL(url)
+        self.status = status
+        self.reason = reason
+        headers["Content-Length"] = str(len(body))
+        self.headers = CIMultiDictProxy(headers)
+        self.content = _ReplayContent(body)
+        self.history: tuple[Any, ...] = ()
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < HTTPStatus.BAD_REQUEST
+
+    @property
+    def content_type(self) -> str:
+        return (
+            self.headers.get("Content-Type", "application/octet-stream")
+            .split(";", 1)[0]
+            .strip()
+            .lower()
+        )
+
+    @property
+    def content_length(self) -> int | None:
+        return len(self._body)
+
+    @property
+    def request_info(self) -> aiohttp.RequestInfo:
+        return aiohttp.RequestInfo(
+            self.url,
+            self.method,
+            CIMultiDictProxy(CIMultiDict()),
+            self.url,
+        )
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str | None = None) -> str:
+        return self._body.decode(encoding or "utf-8")
+
+    async def json(self, *, content_type: str | None = "application/json") -> Any:
+        if content_type is not None and content_type not in self.content_type:
+            raise aiohttp.ContentTypeError(
+                self.request_info,
+                self.history,
+                status=self.status,
+                message=f"Attempt to decode JSON with unexpected mimetype: {self.content_type}",
+                headers=self.headers,
+            )
+
+        return json.loads(self._body)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                self.request_info,
+                self.history,
+                status=self.status,
+                message=self.reason or "",
+                headers=self.headers,
+            )
+
+    def release(self) -> None:
+        pass
+
+
+class ReplayTransport(Transport):
+    # Serves the responses of a cassette without network access.
+    #
+    # Requests are matched by method, URL, query parameters and body. Repeated
+    # requests are answered with the recorded responses in recording order, the last
+    # one is served again once they are exhausted.
+    # By default responses are served immediately, with speed set they are delayed by
+    # the recorded request duration divided by speed, e.g. speed=1.0 for the recorded
+    # timing.
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        speed: float | None = None,
+    ) -> None:
+        if speed is not None and speed <= 0:
+            msg = f"speed must be positive, got {speed}"
+            raise ValueError(msg)
+
+        self._speed = speed
+        self._entries: dict[str, collections.deque[dict[str, Any]]] = {}
+
+        with gzip.open(Path(path), "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], collections.deque()).append(
+                    entry,
+                )
+
+    async def request(
+        self,
+        method: str,
+        url: str | URL,
+        **kwargs: Any,
+    ) -> Response:
+        key = _request_key(method, url, kwargs)
+        entries = self._entries.get(key)
+        if not entries:
+            msg = f"no recorded response for {key}"
+            raise LookupError(msg)
+
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+
+        if self._speed is not None:
+            await asyncio.sleep(entry["elapsed"] / self._speed)
+
+        if "error" in entry:
+            if entry["error"] == "timeout":
+                raise asyncio.TimeoutError
+            raise aiohttp.ClientConnectionError(entry["error"])
+
+        body = (
+            entry["text"].encode()
+            if "text" in entry
+            else base64.b64decode(entry["base64"])
+        )
+
+        return ReplayResponse(
+            method,
+            key.split(" ", 2)[1],
+            status=entry["status"],
+            reason=entry["reason"],
+            headers=CIMultiDict(entry["headers"]),
+            body=body,
+        )
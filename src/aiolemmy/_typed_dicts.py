@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import sys
-from typing import TYPE_CHECKING, Literal, TypedDict
+from typing import TYPE_CHECKING, Any, Literal, TypedDict
 
 if sys.version_info >= (3, 11):
     from typing import NotRequired
@@ -9,7 +9,12 @@ else:
     from typing_extensions import NotRequired
 
 if TYPE_CHECKING:
-    from aiolemmy._enum_types import ListingType, SortType
+    from aiolemmy._enum_types import (
+        CommentSortType,
+        ListingType,
+        ModlogActionType,
+        SortType,
+    )
 
 
 class GetApiV3CommentReportListParams(TypedDict):
@@ -50,6 +55,21 @@ class GetApiV3PostListParams(TypedDict):
     type_: NotRequired[ListingType | None]
 
 
+class GetApiV3CommentListParams(TypedDict):
+    community_id: NotRequired[int | None]
+    community_name: NotRequired[str | None]
+    disliked_only: NotRequired[Literal["true", "false"] | None]
+    liked_only: NotRequired[Literal["true", "false"] | None]
+    limit: NotRequired[int | None]
+    max_depth: NotRequired[int | None]
+    page: NotRequired[int | None]
+    parent_id: NotRequired[int | None]
+    post_id: NotRequired[int | None]
+    saved_only: NotRequired[Literal["true", "false"] | None]
+    sort: NotRequired[CommentSortType | None]
+    type_: NotRequired[ListingType | None]
+
+
 class GetApiV3UserParams(TypedDict):
     community_id: NotRequired[int | None]
     limit: NotRequired[int | None]
@@ -68,4 +88,251 @@ class GetApiV3ModlogParams(TypedDict):
     other_person_id: NotRequired[int | None]
     page: NotRequired[int | None]
     person_id: NotRequired[int | None]
-    type_: NotRequired[ListingType | None]
+    type_: NotRequired[ModlogActionType | None]
+
+
+# Response objects, as returned by Lemmy 0.19
+
+
+class Person(TypedDict):
+    id: int
+    name: str
+    display_name: NotRequired[str | None]
+    avatar: NotRequired[str | None]
+    banned: bool
+    published: str
+    updated: NotRequired[str | None]
+    actor_id: str
+    bio: NotRequired[str | None]
+    local: bool
+    banner: NotRequired[str | None]
+    deleted: bool
+    matrix_user_id: NotRequired[str | None]
+    bot_account: bool
+    ban_expires: NotRequired[str | None]
+    instance_id: int
+
+
+class PersonAggregates(TypedDict):
+    person_id: int
+    post_count: int
+    comment_count: int
+
+
+class Community(TypedDict):
+    id: int
+    name: str
+    title: str
+    description: NotRequired[str | None]
+    removed: bool
+    published: str
+    updated: NotRequired[str | None]
+    deleted: bool
+    nsfw: bool
+    actor_id: str
+    local: bool
+    icon: NotRequired[str | None]
+    banner: NotRequired[str | None]
+    hidden: bool
+    posting_restricted_to_mods: bool
+    instance_id: int
+    visibility: NotRequired[str]
+
+
+class Post(TypedDict):
+    id: int
+    name: str
+    url: NotRequired[str | None]
+    body: NotRequired[str | None]
+    creator_id: int
+    community_id: int
+    removed: bool
+    locked: bool
+    published: str
+    updated: NotRequired[str | None]
+    deleted: bool
+    nsfw: bool
+    embed_title: NotRequired[str | None]
+    embed_description: NotRequired[str | None]
+    thumbnail_url: NotRequired[str | None]
+    ap_id: str
+    local: bool
+    embed_video_url: NotRequired[str | None]
+    language_id: int
+    featured_community: bool
+    featured_local: bool
+    url_content_type: NotRequired[str | None]
+    alt_text: NotRequired[str | None]
+
+
+class PostAggregates(TypedDict):
+    post_id: int
+    comments: int
+    score: int
+    upvotes: int
+    downvotes: int
+    published: str
+    newest_comment_time: str
+
+
+class Comment(TypedDict):
+    id: int
+    creator_id: int
+    post_id: int
+    content: str
+    removed: bool
+    published: str
+    updated: NotRequired[str | None]
+    deleted: bool
+    ap_id: str
+    local: bool
+    path: str
+    distinguished: bool
+    language_id: int
+
+
+class CommentAggregates(TypedDict):
+    comment_id: int
+    score: int
+    upvotes: int
+    downvotes: int
+    published: str
+    child_count: int
+
+
+class PrivateMessage(TypedDict):
+    id: int
+    creator_id: int
+    recipient_id: int
+    content: str
+    deleted: bool
+    read: bool
+    published: str
+    updated: NotRequired[str | None]
+    ap_id: str
+    local: bool
+
+
+class CommentReport(TypedDict):
+    id: int
+    creator_id: int
+    comment_id: int
+    original_comment_text: str
+    reason: str
+    resolved: bool
+    resolver_id: NotRequired[int | None]
+    published: str
+    updated: NotRequired[str | None]
+
+
+class PostReport(TypedDict):
+    id: int
+    creator_id: int
+    post_id: int
+    original_post_name: str
+    original_post_url: NotRequired[str | None]
+    original_post_body: NotRequired[str | None]
+    reason: str
+    resolved: bool
+    resolver_id: NotRequired[int | None]
+    published: str
+    updated: NotRequired[str | None]
+
+
+class PrivateMessageReport(TypedDict):
+    id: int
+    creator_id: int
+    private_message_id: int
+    original_pm_text: str
+    reason: str
+    resolved: bool
+    resolver_id: NotRequired[int | None]
+    published: str
+    updated: NotRequired[str | None]
+
+
+class PersonView(TypedDict):
+    person: Person
+    counts: PersonAggregates
+    is_admin: bool
+
+
+class PostView(TypedDict):
+    post: Post
+    creator: Person
+    community: Community
+    image_details: NotRequired[dict[str, Any] | None]
+    creator_banned_from_community: bool
+    banned_from_community: NotRequired[bool]
+    creator_is_moderator: bool
+    creator_is_admin: bool
+    counts: PostAggregates
+    subscribed: str
+    saved: bool
+    read: bool
+    hidden: bool
+    creator_blocked: bool
+    my_vote: NotRequired[int | None]
+    unread_comments: int
+
+
+class CommentView(TypedDict):
+    comment: Comment
+    creator: Person
+    post: Post
+    community: Community
+    counts: CommentAggregates
+    creator_banned_from_community: bool
+    banned_from_community: NotRequired[bool]
+    creator_is_moderator: bool
+    creator_is_admin: bool
+    subscribed: str
+    saved: bool
+    creator_blocked: bool
+    my_vote: NotRequired[int | None]
+
+
+class CommentReportView(TypedDict):
+    comment_report: CommentReport
+    comment: Comment
+    post: Post
+    community: Community
+    creator: Person
+    comment_creator: Person
+    counts: CommentAggregates
+    creator_banned_from_community: bool
+    creator_is_moderator: bool
+    creator_is_admin: bool
+    creator_blocked: bool
+    subscribed: str
+    saved: bool
+    my_vote: NotRequired[int | None]
+    resolver: NotRequired[Person | None]
+
+
+class PostReportView(TypedDict):
+    post_report: PostReport
+    post: Post
+    community: Community
+    creator: Person
+    post_creator: Person
+    creator_banned_from_community: bool
+    creator_is_moderator: bool
+    creator_is_admin: bool
+    subscribed: str
+    saved: bool
+    read: bool
+    hidden: bool
+    creator_blocked: bool
+    my_vote: NotRequired[int | None]
+    unread_comments: int
+    counts: PostAggregates
+    resolver: NotRequired[Person | None]
+
+
+class PrivateMessageReportView(TypedDict):
+    private_message_report: PrivateMessageReport
+    private_message: PrivateMessage
+    private_message_creator: Person
+    creator: Person
+    resolver: NotRequired[Person | None]
@@ -1,27 +1,69 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
 import logging
+import sys
+import time
 import urllib.parse
-from datetime import datetime
+from collections import deque
+from contextlib import aclosing
+from http import HTTPStatus
 from typing import TYPE_CHECKING, Any
 
 import aiohttp.client
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Mapping
+    from datetime import datetime
+    from types import TracebackType
+
+    from aiolemmy._auth import Account, AuthManager
+    from aiolemmy._cache import CacheBackend
+    from aiolemmy._checkpoint import CheckpointStore
+    from aiolemmy._content_store import ContentStore
+    from aiolemmy._enum_types import ModlogActionType
+    from aiolemmy._json import JSONDumps, JSONLoads
+    from aiolemmy._metrics import MetricsSink
+    from aiolemmy._rate_limit import RateLimiter
+    from aiolemmy._retry import RetryPolicy
+    from aiolemmy._transport import Response, Transport
     from aiolemmy._typed_dicts import (
+        GetApiV3CommentListParams,
         GetApiV3CommentReportListParams,
         GetApiV3ModlogParams,
-        GetApiV3PostListParams,
         GetApiV3PostReportListParams,
         GetApiV3PrivateMessageReportListParams,
         GetApiV3UserParams,
     )
 
+from ._cache import DEFAULT_CACHE_TTLS, CacheEntry
+from ._comment_tree import CommentTree
+from ._connection import ConnectionConfig
+from ._crawler import PostCrawl, as_utc, parse_published
+from ._json import detect_json
+from ._json_stream import iter_array_items
+from ._metrics import RequestMetrics
+from ._query import QueryEncoder
+from ._single_flight import SingleFlight
+from ._transport import AiohttpTransport
 from ._version import version
 
 logger = logging.getLogger(__name__)
 
 PAGE_LIMIT_MAX = 50
+# Comments returned for requests with max_depth, which ignore pagination
+COMMENT_TREE_LIMIT = 300
 
 MODLOG_TYPES = {
     "removed_posts": "mod_remove_post",
@@ -41,6 +83,69 @@ MODLOG_TYPES = {
     "hidden_communities": "mod_hide_community",
 }
 
+# modlog response keys mapped to the action type filtering the modlog for them
+MODLOG_ACTION_TYPES: dict[str, ModlogActionType] = {
+    "removed_posts": "ModRemovePost",
+    "locked_posts": "ModLockPost",
+    "featured_posts": "ModFeaturePost",
+    "removed_comments": "ModRemoveComment",
+    "removed_communities": "ModRemoveCommunity",
+    "banned_from_community": "ModBanFromCommunity",
+    "banned": "ModBan",
+    "added_to_community": "ModAddCommunity",
+    "transferred_to_community": "ModTransferCommunity",
+    "added": "ModAdd",
+    "admin_purged_persons": "AdminPurgePerson",
+    "admin_purged_communities": "AdminPurgeCommunity",
+    "admin_purged_posts": "AdminPurgePost",
+    "admin_purged_comments": "AdminPurgeComment",
+    "hidden_communities": "ModHideCommunity",
+}
+
+FEDERATED_INSTANCE_LISTS = (
+    ("federated_instances", "linked"),
+    ("federated_instances", "allowed"),
+    ("federated_instances", "blocked"),
+)
+
+_LIST_COMMUNITIES_QUERY = QueryEncoder(
+    "limit",
+    "page",
+    "show_nsfw",
+    "sort",
+    "type_",
+)
+
+_LIST_POSTS_QUERY = QueryEncoder(
+    "community_id",
+    "community_name",
+    "disliked_only",
+    "liked_only",
+    "limit",
+    "page",
+    "page_cursor",
+    "saved_only",
+    "sort",
+    "type_",
+)
+
+_LIST_COMMENTS_QUERY = QueryEncoder(
+    "community_id",
+    "community_name",
+    "disliked_only",
+    "liked_only",
+    "limit",
+    "max_depth",
+    "page",
+    "parent_id",
+    "post_id",
+    "saved_only",
+    "sort",
+    "type_",
+)
+
+DEFAULT_TIMEOUT = aiohttp.client.ClientTimeout(sock_connect=5)
+
 DEFAULT_USER_AGENT = f"aiolemmy/{version} (https://github.com/Nothing4You/aiolemmy)"
 
 
@@ -49,22 +154,78 @@ class Lemmy:
 
     def __init__(
         self,
-        session: aiohttp.client.ClientSession,
+        session: aiohttp.client.ClientSession | None,
         instance_base_url: str,
         *,
+        connection: ConnectionConfig | None = None,
         user_agent: str | None = None,
         jwt: str | None = None,
+        auth: AuthManager | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        retry_overrides: Mapping[str, RetryPolicy | None] | None = None,
+        cache: CacheBackend | None = None,
+        cache_ttls: Mapping[str, float] | None = None,
+        json_loads: JSONLoads | None = None,
+        json_dumps: JSONDumps | None = None,
+        metrics: MetricsSink | None = None,
+        transport: Transport | None = None,
     ) -> None:
+        # Without a session, one is created on first use from the connection config and
+        # closed again by close().
+        if session is not None and connection is not None:
+            msg = "connection can only be used without passing a session"
+            raise ValueError(msg)
+        if jwt is not None and auth is not None:
+            msg = "jwt and auth must not both be passed"
+            raise ValueError(msg)
         self._session = session
-        self._common_headers = {
-            "User-Agent": (
-                user_agent if user_agent is not None else DEFAULT_USER_AGENT
-            ),
-        }
+        self._connection = connection if connection is not None else ConnectionConfig()
+        self._transport: Transport | None = transport
+        self._owns_session = False
+        if transport is None and session is not None:
+            self._transport = AiohttpTransport(session)
+        self._metrics = metrics
+        if json_loads is None or json_dumps is None:
+            detected_loads, detected_dumps = detect_json()
+            json_loads = json_loads if json_loads is not None else detected_loads
+            json_dumps = json_dumps if json_dumps is not None else detected_dumps
+        self._json_loads = json_loads
+        self._json_dumps = json_dumps
+        self._cache = cache
+        # endpoint paths mapped to the number of seconds their responses are cached
+        self._cache_ttls = dict(
+            cache_ttls if cache_ttls is not None else DEFAULT_CACHE_TTLS,
+        )
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        # endpoint paths, e.g. /api/v3/post/remove, mapped to the policy to use instead
+        self._retry_overrides = (
+            dict(retry_overrides) if retry_overrides is not None else {}
+        )
+        common_headers = CIMultiDict(
+            {
+                "User-Agent": (
+                    user_agent if user_agent is not None else DEFAULT_USER_AGENT
+                ),
+            },
+        )
 
         if jwt is not None:
             self._jwt = jwt
-            self._common_headers["authorization"] = f"Bearer {jwt}"
+            common_headers["authorization"] = f"Bearer {jwt}"
+
+        # immutable, so they can be passed on to every request as they are
+        self._common_headers = CIMultiDictProxy(common_headers.copy())
+        common_headers["Content-Type"] = "application/json"
+        self._json_headers = CIMultiDictProxy(common_headers)
+
+        # tokens of auth's accounts mapped to their common and JSON headers
+        self._auth = auth
+        self._token_headers: dict[
+            str,
+            tuple[CIMultiDictProxy[str], CIMultiDictProxy[str]],
+        ] = {}
 
         if instance_base_url.endswith("/"):
             self._instance_base_url = instance_base_url[:-1]
@@ -73,30 +234,469 @@ class Lemmy:
 
         self._domain = urllib.parse.urlsplit(self._instance_base_url).hostname
 
+        self._single_flight = SingleFlight()
+        self._endpoints: dict[str, tuple[URL, str]] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        # Closes the session if it was created by this client. Passed in sessions and
+        # transports are left to the caller.
+        if self._owns_session and self._session is not None:
+            session = self._session
+            self._session = None
+            self._transport = None
+            self._owns_session = False
+            await session.close()
+
+    def _get_transport(self) -> Transport:
+        if self._transport is None:
+            self._session = self._connection.create_session()
+            self._transport = AiohttpTransport(self._session)
+            self._owns_session = True
+
+        return self._transport
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _auth_identity(jwt: str | None) -> str:
+        if jwt is None:
+            return "anonymous"
+
+        return hashlib.sha256(jwt.encode()).hexdigest()[:16]
+
+    def _cache_key(self, url: str, jwt: str | None) -> str:
+        # responses like /site differ by user, so entries must not be shared between them
+        return f"{url}#{self._auth_identity(jwt)}"
+
+    async def _get_json(
+        self,
+        url: str,
+        /,
+        params: Mapping[str, Any] | None = None,
+        *,
+        raise_for_status: bool = True,
+    ) -> Any:
+        # Concurrent identical requests share a single request and its decoded response,
+        # which therefore must not be modified by callers.
+        account, jwt = await self._select_account("get")
+        key = (
+            url,
+            tuple(sorted(params.items())) if params is not None else (),
+            self._auth_identity(jwt),
+            raise_for_status,
+        )
+
+        async def fetch() -> Any:
+            r = await self._get(
+                url,
+                params=params,
+                raise_for_status=raise_for_status,
+                account=account,
+            )
+            return await self._json(r)
+
+        return await self._single_flight.do(key, fetch)
+
+    async def _get_cached_json(self, url: str) -> Any:
+        cache = self._cache
+        ttl = self._cache_ttls.get(self._endpoint(url)[1])
+        if cache is None or ttl is None:
+            return await self._get_json(url)
+
+        account, jwt = await self._select_account("get")
+        key = self._cache_key(url, jwt)
+        return await self._single_flight.do(
+            ("cached", key),
+            lambda: self._revalidate_cached_json(cache, url, key, ttl, account),
+        )
+
+    async def _revalidate_cached_json(
+        self,
+        cache: CacheBackend,
+        url: str,
+        key: str,
+        ttl: float,
+        account: Account | None,
+    ) -> Any:
+        entry = await cache.get(key)
+        now = time.time()
+
+        if entry is not None and entry.expires_at > now:
+            return self._json_loads(entry.body)
+
+        headers = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        r = await self._get(url, headers=headers, account=account)
+
+        if r.status == HTTPStatus.NOT_MODIFIED and entry is not None:
+            logger.debug("Cached response for %s is still valid", url)
+            r.release()
+            entry = dataclasses.replace(entry, expires_at=now + ttl)
+        else:
+            entry = CacheEntry(
+                body=await r.read(),
+                expires_at=now + ttl,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
+
+        await cache.set(key, entry)
+
+        return self._json_loads(entry.body)
+
+    async def invalidate_cache(self, *paths: str) -> None:
+        # Drops cached responses for the given endpoint paths, or all cached responses
+        # if no path is given. Shared backends only drop entries for this client's users
+        # and anonymous users.
+        if self._cache is None:
+            return
+
+        if not paths:
+            await self._cache.clear()
+            return
+
+        jwts = [self._jwt]
+        if self._auth is not None:
+            jwts.extend(account.jwt for account in self._auth.accounts)
+
+        for path in paths:
+            url = f"{self._instance_base_url}{path}"
+            await self._cache.delete(self._cache_key(url, None))
+            for jwt in jwts:
+                if jwt is not None:
+                    await self._cache.delete(self._cache_key(url, jwt))
+
+    def _endpoint(self, url: str) -> tuple[URL, str]:
+        # the parsed URL and endpoint path, e.g. /api/v3/post/list
+        endpoint = self._endpoints.get(url)
+        if endpoint is not None:
+            return endpoint
+
+        if url.startswith(self._instance_base_url):
+            endpoint = (URL(url), url[len(self._instance_base_url) :])
+            # only this instance's endpoints are kept, which are a fixed set
+            self._endpoints[url] = endpoint
+        else:
+            endpoint = (URL(url), urllib.parse.urlsplit(url).path)
+
+        return endpoint
+
+    @staticmethod
+    def _check_json_content_type(r: Response) -> None:
+        # Same content type check as aiohttp's ClientResponse.json()
+        if "json" not in r.content_type:
+            raise aiohttp.client.ContentTypeError(
+                r.request_info,
+                r.history,
+                status=r.status,
+                message=f"Attempt to decode JSON with unexpected mimetype: {r.content_type}",
+                headers=r.headers,
+            )
+
+    async def _json(self, r: Response) -> Any:
+        # decodes the body with the configured JSON implementation
+        self._check_json_content_type(r)
+        return self._json_loads(await r.read())
+
+    async def _select_account(self, method: str) -> tuple[Account | None, str | None]:
+        # the account to use for a request and its token, writes use the write account
+        if self._auth is None:
+            return None, self._jwt
+
+        account = self._auth.select(write=method != "get")
+        return account, await account.token(self)
+
+    async def _request_account(
+        self,
+        method: str,
+        kwargs: dict[str, Any],
+    ) -> tuple[Account | None, str | None]:
+        # auth=False sends the request without a token, account= with the given
+        # account's instead of selecting one
+        account = kwargs.pop("account", None)
+        if not kwargs.pop("auth", True):
+            return None, None
+
+        if account is None:
+            return await self._select_account(method)
+
+        return account, await account.token(self)
+
+    async def _relogin(
+        self,
+        account: Account,
+        rejected_jwt: str | None,
+        kwargs: dict[str, Any],
+    ) -> str | None:
+        # Logs in again and updates the request's headers to the new token. Returns the
+        # new token, or None if the account can't log in again.
+        jwt = await account.refresh(self, rejected_jwt)
+        if jwt is not None:
+            logger.info("Logged in again as %r after its token was rejected", account)
+            if rejected_jwt is not None:
+                self._token_headers.pop(rejected_jwt, None)
+            headers = CIMultiDict(kwargs["headers"])
+            headers["authorization"] = f"Bearer {jwt}"
+            kwargs["headers"] = headers
+
+        return jwt
+
+    def _request_headers(
+        self,
+        jwt: str | None,
+        json: bool,
+        extra_headers: Mapping[str, str] | None,
+    ) -> Mapping[str, str]:
+        # reuses the immutable defaults unless extra headers were passed
+        if jwt == self._jwt:
+            headers = self._json_headers if json else self._common_headers
+        elif jwt is not None:
+            common_headers, json_headers = self._token_headers_for(jwt)
+            headers = json_headers if json else common_headers
+        else:
+            # without the token passed as jwt to the client
+            headers = CIMultiDict(self._json_headers if json else self._common_headers)
+            del headers["authorization"]
+
+        if extra_headers is not None:
+            headers = CIMultiDict(headers)
+            headers.update(extra_headers)
+
+        return headers
+
+    def _token_headers_for(
+        self,
+        jwt: str,
+    ) -> tuple[CIMultiDictProxy[str], CIMultiDictProxy[str]]:
+        # the common and JSON headers for requests authenticated with one of auth's
+        # accounts
+        headers = self._token_headers.get(jwt)
+        if headers is None:
+            common_headers = CIMultiDict(self._common_headers)
+            common_headers["authorization"] = f"Bearer {jwt}"
+            json_headers = common_headers.copy()
+            json_headers["Content-Type"] = "application/json"
+            headers = (
+                CIMultiDictProxy(common_headers),
+                CIMultiDictProxy(json_headers),
+            )
+            self._token_headers[jwt] = headers
+
+        return headers
+
+    def _prepare_request(self, kwargs: dict[str, Any], jwt: str | None) -> None:
+        # encodes json= into data= and fills in headers and the timeout
+        json = "json" in kwargs
+        if json:
+            kwargs["data"] = self._json_dumps(kwargs.pop("json"))
+
+        kwargs["headers"] = self._request_headers(jwt, json, kwargs.get("headers"))
+
+        if "timeout" not in kwargs:
+            kwargs["timeout"] = DEFAULT_TIMEOUT
+
     async def _request(
         self,
         method: str,
         url: str,
         /,
         **kwargs: Any,
-    ) -> aiohttp.client.ClientResponse:
-        if "raise_for_status" not in kwargs:
-            kwargs["raise_for_status"] = True
+    ) -> Response:
+        raise_for_status = kwargs.pop("raise_for_status", True)
+        # with stream=True the body is left unread for the caller to consume r.content
+        stream = kwargs.pop("stream", False)
+
+        account, jwt = await self._request_account(method, kwargs)
+        relogged_in = False
+        self._prepare_request(kwargs, jwt)
+
+        request_url, path = self._endpoint(url)
+        retry_policy = self._retry_overrides.get(path, self._retry_policy)
+        if retry_policy is not None and not retry_policy.allows(method):
+            retry_policy = None
+
+        started = time.monotonic()
+        attempt = 0
+        r: Response | None = None
+        size: int | None = None
+        try:
+            while True:
+                attempt += 1
+
+                if self._rate_limiter is not None:
+                    await self._rate_limiter.acquire(method, path)
+
+                try:
+                    r = await self._get_transport().request(
+                        method,
+                        request_url,
+                        **kwargs,
+                    )
+                    # The body is read as part of the attempt, so interrupted downloads
+                    # can be retried and the request's latency and size are known.
+                    if (
+                        not stream
+                        and (
+                            retry_policy is None
+                            or r.status not in retry_policy.statuses
+                        )
+                        and (r.ok or not raise_for_status)
+                    ):
+                        size = len(await r.read())
+                except (
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    r = None
+                    delay = self._retry_delay(
+                        retry_policy,
+                        method=method,
+                        path=path,
+                        attempt=attempt,
+                        elapsed=time.monotonic() - started,
+                        error=e,
+                    )
+                    if delay is None:
+                        raise
 
-        if "headers" in kwargs:
-            kwargs["headers"] = self._common_headers | kwargs["headers"]
-        else:
-            kwargs["headers"] = self._common_headers
+                    await asyncio.sleep(delay)
+                    continue
 
-        if "timeout" not in kwargs:
-            kwargs["timeout"] = aiohttp.client.ClientTimeout(
-                sock_connect=5,
+                if (
+                    account is not None
+                    and not relogged_in
+                    and await self._token_rejected(r)
+                ):
+                    # the token has expired or was revoked, retried once with a new one
+                    relogged_in = True
+                    new_jwt = await self._relogin(account, jwt, kwargs)
+                    if new_jwt is not None:
+                        r.release()
+                        jwt = new_jwt
+                        continue
+
+                if retry_policy is not None and r.status in retry_policy.statuses:
+                    delay = self._retry_delay(
+                        retry_policy,
+                        method=method,
+                        path=path,
+                        attempt=attempt,
+                        elapsed=time.monotonic() - started,
+                        response=r,
+                    )
+                    if delay is not None:
+                        r.release()
+                        await asyncio.sleep(delay)
+                        continue
+
+                    if not raise_for_status and not stream:
+                        size = len(await r.read())
+
+                if raise_for_status:
+                    r.raise_for_status()
+
+                return r
+        finally:
+            if self._metrics is not None:
+                self._record_metrics(
+                    method=method,
+                    path=path,
+                    params=kwargs.get("params"),
+                    response=r,
+                    size=size,
+                    latency=time.monotonic() - started,
+                    retries=attempt - 1,
+                )
+
+    @staticmethod
+    async def _token_rejected(r: Response) -> bool:
+        # Lemmy 0.19 handles requests with an invalid token like anonymous ones, so
+        # endpoints requiring a login answer 400 not_logged_in rather than 401.
+        if r.status == HTTPStatus.UNAUTHORIZED:
+            return True
+        if r.status != HTTPStatus.BAD_REQUEST:
+            return False
+
+        try:
+            j = json.loads(await r.read())
+        except ValueError:
+            return False
+
+        return isinstance(j, dict) and j.get("error") == "not_logged_in"
+
+    @staticmethod
+    def _retry_delay(
+        retry_policy: RetryPolicy | None,
+        *,
+        method: str,
+        path: str,
+        attempt: int,
+        elapsed: float,
+        response: Response | None = None,
+        error: BaseException | None = None,
+    ) -> float | None:
+        if retry_policy is None:
+            return None
+
+        delay = retry_policy.retry_delay(
+            attempt,
+            elapsed,
+            response.headers.get("Retry-After") if response is not None else None,
+        )
+        if delay is not None:
+            logger.warning(
+                "%s %s failed with %s, retrying in %.2fs",
+                method.upper(),
+                path,
+                f"status {response.status}" if response is not None else repr(error),
+                delay,
             )
 
-        return await self._session.request(
-            method,
-            url,
-            **kwargs,
+        return delay
+
+    def _record_metrics(
+        self,
+        *,
+        method: str,
+        path: str,
+        params: Mapping[str, Any] | None,
+        response: Response | None,
+        size: int | None,
+        latency: float,
+        retries: int,
+    ) -> None:
+        if self._metrics is None:
+            return
+
+        if size is None and response is not None:
+            size = response.content_length
+
+        self._metrics.record(
+            RequestMetrics(
+                endpoint=path,
+                method=method.upper(),
+                status=response.status if response is not None else None,
+                latency=latency,
+                response_size=size,
+                retries=retries,
+                page=params.get("page") if params is not None else None,
+            ),
         )
 
     async def _get(
@@ -104,7 +704,7 @@ class Lemmy:
         url: str,
         /,
         **kwargs: Any,
-    ) -> aiohttp.client.ClientResponse:
+    ) -> Response:
         return await self._request(
             "get",
             url,
@@ -116,7 +716,7 @@ class Lemmy:
         url: str,
         /,
         **kwargs: Any,
-    ) -> aiohttp.client.ClientResponse:
+    ) -> Response:
         return await self._request(
             "post",
             url,
@@ -128,13 +728,63 @@ class Lemmy:
         url: str,
         /,
         **kwargs: Any,
-    ) -> aiohttp.client.ClientResponse:
+    ) -> Response:
         return await self._request(
             "put",
             url,
             **kwargs,
         )
 
+    async def _iter_pages(
+        self,
+        url: str,
+        query: Mapping[str, Any],
+        description: str,
+        prefetch: int = 0,
+    ) -> AsyncIterator[Any]:
+        # Yields decoded pages in page order, starting at query["page"].
+        # With prefetch > 0, up to that many following pages are already requested
+        # while the current one is being processed. Consumers should close the
+        # iterator (e.g. via contextlib.aclosing) once done, which cancels them.
+        async def fetch(page: int) -> Any:
+            logger.debug("Retrieving %s page %s", description, page)
+            return await self._get_json(url, params={**query, "page": page})
+
+        page = query["page"]
+
+        if prefetch <= 0:
+            while True:
+                yield await fetch(page)
+                page += 1
+
+        pending: deque[asyncio.Task[Any]] = deque()
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    pending.append(asyncio.create_task(fetch(page)))
+                    page += 1
+
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def login(self, username_or_email: str, password: str) -> Any:
+        # Returns the login response, whose jwt is None if the registration is pending
+        # approval or email verification. The token isn't used by this client, pass an
+        # AuthManager as auth to log in automatically.
+        r = await self._post(
+            f"{self._instance_base_url}/api/v3/user/login",
+            json={
+                "username_or_email": username_or_email,
+                "password": password,
+            },
+            auth=False,
+        )
+
+        return await self._json(r)
+
     async def list_communities(
         self,
         *,
@@ -143,20 +793,15 @@ class Lemmy:
         show_nsfw: bool | None = None,
         sort: str | None = None,
         type_: str | None = None,
-    ) -> aiohttp.ClientResponse:
+    ) -> Response:
         url = f"{self._instance_base_url}/api/v3/community/list"
-        query: dict[str, int | str] = {}
-
-        if limit is not None:
-            query["limit"] = limit
-        if page is not None:
-            query["page"] = page
-        if show_nsfw is not None:
-            query["show_nsfw"] = str(show_nsfw).lower()
-        if sort is not None:
-            query["sort"] = sort
-        if type_ is not None:
-            query["type_"] = type_
+        query = _LIST_COMMUNITIES_QUERY.encode(
+            limit,
+            page,
+            show_nsfw,
+            sort,
+            type_,
+        )
 
         return await self._get(url, params=query, raise_for_status=False)
 
@@ -173,30 +818,20 @@ class Lemmy:
         saved_only: bool | None = None,
         sort: str | None = None,
         type_: str | None = None,
-    ) -> aiohttp.ClientResponse:
+    ) -> Response:
         url = f"{self._instance_base_url}/api/v3/post/list"
-        query: dict[str, int | str] = {}
-
-        if community_id is not None:
-            query["community_id"] = community_id
-        if community_name is not None:
-            query["community_name"] = community_name
-        if disliked_only is not None:
-            query["disliked_only"] = str(disliked_only).lower()
-        if liked_only is not None:
-            query["liked_only"] = str(liked_only).lower()
-        if limit is not None:
-            query["limit"] = limit
-        if page is not None:
-            query["page"] = page
-        if page_cursor is not None:
-            query["page_cursor"] = page_cursor
-        if saved_only is not None:
-            query["saved_only"] = str(saved_only).lower()
-        if sort is not None:
-            query["sort"] = sort
-        if type_ is not None:
-            query["type_"] = type_
+        query = _LIST_POSTS_QUERY.encode(
+            community_id,
+            community_name,
+            disliked_only,
+            liked_only,
+            limit,
+            page,
+            page_cursor,
+            saved_only,
+            sort,
+            type_,
+        )
 
         return await self._get(url, params=query, raise_for_status=False)
 
@@ -215,44 +850,114 @@ class Lemmy:
         saved_only: bool | None = None,
         sort: str | None = None,
         type_: str | None = None,
-    ) -> aiohttp.ClientResponse:
+    ) -> Response:
         url = f"{self._instance_base_url}/api/v3/comment/list"
-        query: dict[str, int | str] = {}
-
-        if community_id is not None:
-            query["community_id"] = community_id
-        if community_name is not None:
-            query["community_name"] = community_name
-        if disliked_only is not None:
-            query["disliked_only"] = str(disliked_only).lower()
-        if liked_only is not None:
-            query["liked_only"] = str(liked_only).lower()
-        if limit is not None:
-            query["limit"] = limit
-        if max_depth is not None:
-            query["max_depth"] = max_depth
-        if page is not None:
-            query["page"] = page
-        if parent_id is not None:
-            query["parent_id"] = parent_id
-        if post_id is not None:
-            query["post_id"] = post_id
-        if saved_only is not None:
-            query["saved_only"] = str(saved_only).lower()
-        if sort is not None:
-            query["sort"] = sort
-        if type_ is not None:
-            query["type_"] = type_
+        query = _LIST_COMMENTS_QUERY.encode(
+            community_id,
+            community_name,
+            disliked_only,
+            liked_only,
+            limit,
+            max_depth,
+            page,
+            parent_id,
+            post_id,
+            saved_only,
+            sort,
+            type_,
+        )
 
         return await self._get(url, params=query, raise_for_status=False)
 
-    async def get_comment_reports(
+    async def _iter_reports(
+        self,
+        url: str,
+        query: (
+            GetApiV3CommentReportListParams
+            | GetApiV3PostReportListParams
+            | GetApiV3PrivateMessageReportListParams
+        ),
+        report_type: str,
+        limit: int | None,
+        prefetch: int,
+    ) -> AsyncIterator[Any]:
+        # report ids to avoid yielding reports twice if they shift between pages
+        seen: set[int] = set()
+
+        # If viewing all reports, order by newest, but if viewing unresolved only, show the oldest first (FIFO)
+        # https://github.com/LemmyNet/lemmy/blob/0.19.3/crates/db_views/src/comment_report_view.rs#L108
+
+        pages = self._iter_pages(
+            url,
+            query,
+            f"{report_type.replace('_', ' ')} reports",
+            prefetch,
+        )
+        async with aclosing(pages):
+            async for j in pages:
+                page_reports = j[f"{report_type}_reports"]
+                for report in page_reports:
+                    report_id = report[f"{report_type}_report"]["id"]
+                    if report_id in seen:
+                        continue
+
+                    seen.add(report_id)
+                    yield report
+
+                    if limit is not None and len(seen) >= limit:
+                        return
+
+                if len(page_reports) < query["limit"]:
+                    return
+
+    async def _collect_reports(
+        self,
+        reports: AsyncIterator[Any],
+        report_type: str,
+        *,
+        limit: int | None,
+        store: ContentStore | None,
+        listing: bool,
+    ) -> dict[int, Any]:
+        # Report ids as keys to avoid double counting them.
+        # With a store, the reports are upserted into it. For the full listing, which
+        # is ordered newest first, reports are only retrieved up to the newest one
+        # stored by the last complete run.
+        watermark_key = f"{report_type}_reports"
+        mark = None
+        if store is not None:
+            store.check_instance(self._instance_base_url)
+            if listing:
+                mark = store.get_watermark(watermark_key)
+
+        collected: dict[int, Any] = {}
+        reached_mark = False
+        async with aclosing(reports):
+            async for report in reports:
+                report_id = report[f"{report_type}_report"]["id"]
+                if mark is not None and report_id <= mark:
+                    logger.debug("Reached stored %s report %s", report_type, mark)
+                    reached_mark = True
+                    break
+
+                collected[report_id] = report
+
+        if store is not None:
+            store.upsert_reports(report_type, collected.values())
+            complete = reached_mark or limit is None or len(collected) < limit
+            if listing and complete and collected:
+                store.set_watermark(watermark_key, max(collected))
+
+        return collected
+
+    def iter_comment_reports(
         self,
         *,
         unresolved_only: bool = False,
         page: int = 1,
         limit: int | None = 20,
-    ) -> dict[int, Any]:
+        prefetch: int = 0,
+    ) -> AsyncIterator[Any]:
         url = f"{self._instance_base_url}/api/v3/comment/report/list"
         query: GetApiV3CommentReportListParams = {
             "page": page,
@@ -263,44 +968,16 @@ class Lemmy:
         if unresolved_only:
             query["unresolved_only"] = "true"
 
-        # report ids as keys to avoid double counting them
-        reports: dict[int, Any] = {}
-
-        # If viewing all reports, order by newest, but if viewing unresolved only, show the oldest first (FIFO)
-        # https://github.com/LemmyNet/lemmy/blob/0.19.3/crates/db_views/src/comment_report_view.rs#L108
-
-        j = None
-        broken = False
-        while not broken and (limit is None or len(reports) < limit):
-            if j is not None:
-                query["page"] += 1
-
-            logger.debug("Retrieving comment reports page %s", query["page"])
-            r = await self._get(url, params=query, raise_for_status=True)
-            j = await r.json()
+        return self._iter_reports(url, query, "comment", limit, prefetch)
 
-            if len(j["comment_reports"]) == 0:
-                break
-
-            for report in j["comment_reports"]:
-                if limit is not None and len(reports) >= limit:
-                    broken = True
-                    break
-
-                if report["comment_report"]["id"] not in reports:
-                    reports[report["comment_report"]["id"]] = report
-
-        logger.debug("Retrieved %s comment reports", len(reports))
-
-        return reports
-
-    async def get_post_reports(
+    def iter_post_reports(
         self,
         *,
         unresolved_only: bool = False,
         page: int = 1,
         limit: int | None = 20,
-    ) -> dict[int, Any]:
+        prefetch: int = 0,
+    ) -> AsyncIterator[Any]:
         url = f"{self._instance_base_url}/api/v3/post/report/list"
         query: GetApiV3PostReportListParams = {
             "page": page,
@@ -311,44 +988,16 @@ class Lemmy:
         if unresolved_only:
             query["unresolved_only"] = "true"
 
-        # report ids as keys to avoid double counting them
-        reports: dict[int, Any] = {}
-
-        # If viewing all reports, order by newest, but if viewing unresolved only, show the oldest first (FIFO)
-        # https://github.com/LemmyNet/lemmy/blob/0.19.3/crates/db_views/src/comment_report_view.rs#L108
-
-        j = None
-        broken = False
-        while not broken and (limit is None or len(reports) < limit):
-            if j is not None:
-                query["page"] += 1
-
-            logger.debug("Retrieving post reports page %s", query["page"])
-            r = await self._get(url, params=query, raise_for_status=True)
-            j = await r.json()
-
-            if len(j["post_reports"]) == 0:
-                break
-
-            for report in j["post_reports"]:
-                if limit is not None and len(reports) >= limit:
-                    broken = True
-                    break
-
-                if report["post_report"]["id"] not in reports:
-                    reports[report["post_report"]["id"]] = report
-
-        logger.debug("Retrieved %s post reports", len(reports))
-
-        return reports
+        return self._iter_reports(url, query, "post", limit, prefetch)
 
-    async def get_private_message_reports(
+    def iter_private_message_reports(
         self,
         *,
         unresolved_only: bool = False,
         page: int = 1,
         limit: int | None = 20,
-    ) -> dict[int, Any]:
+        prefetch: int = 0,
+    ) -> AsyncIterator[Any]:
         url = f"{self._instance_base_url}/api/v3/private_message/report/list"
         query: GetApiV3PrivateMessageReportListParams = {
             "page": page,
@@ -359,32 +1008,81 @@ class Lemmy:
         if unresolved_only:
             query["unresolved_only"] = "true"
 
-        # report ids as keys to avoid double counting them
-        reports: dict[int, Any] = {}
+        return self._iter_reports(url, query, "private_message", limit, prefetch)
 
-        # If viewing all reports, order by newest, but if viewing unresolved only, show the oldest first (FIFO)
-        # https://github.com/LemmyNet/lemmy/blob/0.19.3/crates/db_views/src/comment_report_view.rs#L108
+    async def get_comment_reports(
+        self,
+        *,
+        unresolved_only: bool = False,
+        page: int = 1,
+        limit: int | None = 20,
+        prefetch: int = 0,
+        store: ContentStore | None = None,
+    ) -> dict[int, Any]:
+        reports = await self._collect_reports(
+            self.iter_comment_reports(
+                unresolved_only=unresolved_only,
+                page=page,
+                limit=limit,
+                prefetch=prefetch,
+            ),
+            "comment",
+            limit=limit,
+            store=store,
+            listing=not unresolved_only and page == 1,
+        )
 
-        j = None
-        broken = False
-        while not broken and (limit is None or len(reports) < limit):
-            if j is not None:
-                query["page"] += 1
+        logger.debug("Retrieved %s comment reports", len(reports))
 
-            logger.debug("Retrieving private message reports page %s", query["page"])
-            r = await self._get(url, params=query, raise_for_status=True)
-            j = await r.json()
+        return reports
 
-            if len(j["private_message_reports"]) == 0:
-                break
+    async def get_post_reports(
+        self,
+        *,
+        unresolved_only: bool = False,
+        page: int = 1,
+        limit: int | None = 20,
+        prefetch: int = 0,
+        store: ContentStore | None = None,
+    ) -> dict[int, Any]:
+        reports = await self._collect_reports(
+            self.iter_post_reports(
+                unresolved_only=unresolved_only,
+                page=page,
+                limit=limit,
+                prefetch=prefetch,
+            ),
+            "post",
+            limit=limit,
+            store=store,
+            listing=not unresolved_only and page == 1,
+        )
 
-            for report in j["private_message_reports"]:
-                if limit is not None and len(reports) >= limit:
-                    broken = True
-                    break
+        logger.debug("Retrieved %s post reports", len(reports))
 
-                if report["private_message_report"]["id"] not in reports:
-                    reports[report["private_message_report"]["id"]] = report
+        return reports
+
+    async def get_private_message_reports(
+        self,
+        *,
+        unresolved_only: bool = False,
+        page: int = 1,
+        limit: int | None = 20,
+        prefetch: int = 0,
+        store: ContentStore | None = None,
+    ) -> dict[int, Any]:
+        reports = await self._collect_reports(
+            self.iter_private_message_reports(
+                unresolved_only=unresolved_only,
+                page=page,
+                limit=limit,
+                prefetch=prefetch,
+            ),
+            "private_message",
+            limit=limit,
+            store=store,
+            listing=not unresolved_only and page == 1,
+        )
 
         logger.debug("Retrieved %s private message reports", len(reports))
 
@@ -405,7 +1103,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def resolve_post_report(
         self,
@@ -422,7 +1120,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def resolve_private_message_report(
         self,
@@ -439,7 +1137,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def get_registration_applications(
         self,
@@ -455,101 +1153,243 @@ class Lemmy:
         if unread_only:
             params["unread_only"] = "true"
 
-        r = await self._get(
+        return await self._get_json(
             f"{self._instance_base_url}/api/v3/admin/registration_application/list",
             params=params,
         )
 
-        return await r.json()
+    async def _get_posts_page(self, community: str, params: dict[str, Any]) -> Any:
+        r = await self.list_posts(
+            community_name=community,
+            sort="New",
+            type_="All",
+            **params,
+        )
+
+        if r.content_type == "text/plain":
+            t = await r.text()
+            # This should always have an error status
+            r.raise_for_status()
+            logger.warning("Invalid response while trying to retrieve posts: %r", t)
+            return None
+
+        if r.content_type == "text/html":
+            logger.warning("unexpectedly received html from %s", self._domain)
+            t = await r.text()
+            logger.warning("%r", t)
+            return None
+
+        j = await self._json(r)
+
+        if "error" in j:  # noqa: SIM102
+            # 0.19+ Community is not known to this instance
+            # For removed and deleted communities we will just return an empty posts array
+            if j["error"] == "unknown" and j["message"] == "Record not found":
+                logger.info(
+                    "community %s does not exist on %s",
+                    community,
+                    self._domain,
+                )
+                return None
+
+        return j
+
+    def crawl_community_posts(
+        self,
+        community: str,
+        *,
+        after: datetime | None = None,
+        resume_token: dict[str, Any] | None = None,
+        page_size: int = PAGE_LIMIT_MAX,
+    ) -> PostCrawl:
+        # Async iterable of the community's posts, newest first, see PostCrawl
+        return PostCrawl(
+            functools.partial(self._get_posts_page, community),
+            page_size=min(page_size, PAGE_LIMIT_MAX),
+            after=after,
+            resume_token=resume_token,
+        )
 
-    # TODO: this should use list_posts()
     async def get_community_posts(
         self,
         community: str,
         count: int | None = 100,
         after: datetime | None = None,
+        *,
+        store: ContentStore | None = None,
     ) -> Any:
-        url = f"{self._instance_base_url}/api/v3/post/list"
-        query: GetApiV3PostListParams = {
-            "limit": 20,
-            "sort": "New",
-            "type_": "All",
-            "community_name": community,
-        }
-
+        # With a store, the posts are upserted into it and only posts newer than the
+        # newest one stored by the last complete run are retrieved.
         posts: list[Any] = []
-
-        j = None
-        broken = False
-        while count is None or len(posts) < count:
-            if broken:
-                break
-            if j is not None:
-                if "next_page" in j:
-                    query["page_cursor"] = j["next_page"]
-                elif "page" in query:
-                    query["page"] += 1
-                else:
-                    query["page"] = 2
-
-            r = await self._get(url, params=query, raise_for_status=False)
-
-            if r.content_type == "text/plain":
-                t = await r.text()
-                # This should always have an error status
-                r.raise_for_status()
-                logger.warning("Invalid response while trying to retrieve posts: %r", t)
-                return []
-
-            if r.content_type == "text/html":
-                logger.warning("unexpectedly received html from %s", url)
-                t = await r.text()
-                logger.warning("%r", t)
-                return []
-
-            j = await r.json()
-
-            if "error" in j:  # noqa: SIM102
-                # 0.19+ Community is not known to this instance
-                # For removed and deleted communities we will just return an empty posts array
-                if j["error"] == "unknown" and j["message"] == "Record not found":
-                    logger.info(
-                        "community %s does not exist on %s",
-                        community,
-                        self._domain,
-                    )
-                    return []
-
-            if len(j["posts"]) == 0:
-                logger.debug("received 0 posts")
-                break
-
-            for post in j["posts"]:
+        if count is not None and count <= 0:
+            return posts
+
+        if after is not None:
+            after = as_utc(after)
+
+        watermark_key = f"posts:{community}"
+        mark = None
+        if store is not None:
+            store.check_instance(self._instance_base_url)
+            mark = store.get_watermark(watermark_key)
+        crawl_after = after
+        if mark is not None and (after is None or parse_published(mark) > after):
+            crawl_after = parse_published(mark)
+
+        page_size = min(count, PAGE_LIMIT_MAX) if count is not None else PAGE_LIMIT_MAX
+        crawl = self.crawl_community_posts(
+            community,
+            after=crawl_after,
+            page_size=page_size,
+        )
+        async with aclosing(aiter(crawl)) as crawled:
+            async for post in crawled:
+                posts.append(post)
+                if store is not None and len(posts) % page_size == 0:
+                    store.upsert_posts(posts[-page_size:])
                 if count is not None and len(posts) == count:
                     logger.debug("break; found enough posts at %s", count)
                     break
 
-                if after is not None:
-                    post_published = datetime.fromisoformat(post["post"]["published"])
-                    if post_published <= after:
-                        # community featured posts are listed at the top of the first page and may be older than desired
-                        if post["post"]["featured_community"]:
-                            continue
-
-                        logger.debug(
-                            "breaking; post %s from %s is older than %s",
-                            post["post"]["ap_id"],
-                            post_published,
-                            after,
-                        )
-                        broken = True
+        logger.debug("retrieved %s posts", len(posts))
+
+        if store is not None:
+            store.upsert_posts(posts[len(posts) - len(posts) % page_size :])
+            # Only advanced if every post since the previous watermark was retrieved,
+            # which isn't the case if the crawl stopped at count or a later `after`.
+            covers_mark = after is None or (
+                mark is not None and after <= parse_published(mark)
+            )
+            if posts and crawl.done and covers_mark:
+                newest = max(
+                    (post["post"]["published"] for post in posts),
+                    key=parse_published,
+                )
+                if mark is None or parse_published(newest) > parse_published(mark):
+                    store.set_watermark(watermark_key, newest)
+
+        return posts
+
+    async def get_comment_tree(
+        self,
+        post_id: int,
+        *,
+        max_depth: int = 8,
+        concurrency: int = 4,
+        sort: str = "Old",
+        prefetch: int = 0,
+        store: ContentStore | None = None,
+    ) -> CommentTree:
+        # Fetches all comments of a post. Each request covers max_depth levels below
+        # its parent, comments on the deepest of them that have children according to
+        # counts.child_count are fetched as subtrees of their own, up to `concurrency`
+        # subtrees at the same time.
+        # Lemmy ignores pagination for these requests and returns at most
+        # COMMENT_TREE_LIMIT comments, so subtrees reaching it are fetched again with
+        # half the levels. If even a single level doesn't fit, the subtree is paged
+        # through without max_depth, which is what prefetch applies to.
+        # With a store, the comments are upserted into it.
+        if store is not None:
+            store.check_instance(self._instance_base_url)
+
+        url = f"{self._instance_base_url}/api/v3/comment/list"
+        comments: dict[int, Any] = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_pages(parent_id: int | None) -> None:
+            query: GetApiV3CommentListParams = {
+                "post_id": post_id,
+                "sort": sort,
+                "type_": "All",
+                "page": 1,
+                "limit": PAGE_LIMIT_MAX,
+            }
+            if parent_id is not None:
+                query["parent_id"] = parent_id
+
+            pages = self._iter_pages(
+                url,
+                query,
+                f"comments of post {post_id} below {parent_id or 'post'}",
+                prefetch,
+            )
+            async with aclosing(pages):
+                async for j in pages:
+                    for view in j["comments"]:
+                        comments[view["comment"]["id"]] = view
+
+                    if len(j["comments"]) < query["limit"]:
                         break
 
-                posts.append(post)
+        async def fetch(
+            parent_id: int | None,
+            depth: int,
+            levels: int,
+        ) -> list[tuple[int | None, int, int]]:
+            # returns the subtrees still to fetch as (parent id, depth, levels)
+            query: GetApiV3CommentListParams = {
+                "post_id": post_id,
+                "max_depth": levels,
+                "sort": sort,
+                "type_": "All",
+            }
+            if parent_id is not None:
+                query["parent_id"] = parent_id
+
+            async with semaphore:
+                logger.debug(
+                    "Retrieving %s levels of comments of post %s below %s",
+                    levels,
+                    post_id,
+                    parent_id or "post",
+                )
+                j = await self._get_json(url, params=query)
+                capped = len(j["comments"]) >= COMMENT_TREE_LIMIT
+                if capped and levels == 1:
+                    logger.debug(
+                        "Paging through comments of post %s below %s",
+                        post_id,
+                        parent_id or "post",
+                    )
+                    await fetch_pages(parent_id)
+                    return []
 
-            logger.debug("added posts, now at %s", len(posts))
+            for view in j["comments"]:
+                comments[view["comment"]["id"]] = view
+
+            if capped:
+                return [(parent_id, depth, levels // 2)]
+
+            return [
+                (view["comment"]["id"], depth + levels, levels)
+                for view in j["comments"]
+                if view["comment"]["path"].count(".") == depth + levels
+                and view["counts"]["child_count"] > 0
+            ]
+
+        pending = {asyncio.create_task(fetch(None, 0, max_depth))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    pending.update(
+                        asyncio.create_task(fetch(parent_id, depth, levels))
+                        for parent_id, depth, levels in task.result()
+                    )
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-        return posts
+        logger.debug("Retrieved %s comments of post %s", len(comments), post_id)
+
+        if store is not None:
+            store.upsert_comments(comments.values())
+
+        return CommentTree(comments.values())
 
     async def get_person_details(
         self,
@@ -557,7 +1397,69 @@ class Lemmy:
         person_id: int | None = None,
         sort: str | None = None,
         limit: int | None = 20,
+        *,
+        prefetch: int = 0,
     ) -> Any:
+        url = f"{self._instance_base_url}/api/v3/user"
+        query = self._person_query(username, person_id, sort, limit)
+
+        person_view = None
+        moderates = None
+
+        # content ids as keys to avoid double counting content if new content was added during pagination
+        posts: dict[str, Any] = {}
+        comments: dict[str, Any] = {}
+
+        pages = self._iter_pages(
+            url,
+            query,
+            f"{url} for {username if username is not None else person_id}",
+            prefetch,
+        )
+        async with aclosing(pages):
+            async for j in pages:
+                person_view = j["person_view"]
+                moderates = j["moderates"]
+
+                broken = False
+                for post in j["posts"]:
+                    if limit is not None and len(posts) >= limit:
+                        broken = True
+                        break
+                    posts[post["post"]["id"]] = post
+
+                for comment in j["comments"]:
+                    if limit is not None and len(comments) >= limit:
+                        broken = True
+                        break
+                    comments[comment["comment"]["id"]] = comment
+
+                if broken or (
+                    limit is not None
+                    and (len(posts) >= limit or len(comments) >= limit)
+                ):
+                    break
+
+                if (
+                    len(j["posts"]) < query["limit"]
+                    and len(j["comments"]) < query["limit"]
+                ):
+                    break
+
+        return {
+            "person_view": person_view,
+            "moderates": moderates,
+            "posts": posts,
+            "comments": comments,
+        }
+
+    @staticmethod
+    def _person_query(
+        username: str | None,
+        person_id: int | None,
+        sort: str | None,
+        limit: int | None,
+    ) -> GetApiV3UserParams:
         if username is None and person_id is None:
             raise Exception("username or person_id must be provided")
 
@@ -569,7 +1471,6 @@ class Lemmy:
             username if username is not None else person_id,
         )
 
-        url = f"{self._instance_base_url}/api/v3/user"
         query: GetApiV3UserParams = {
             "sort": sort if sort is not None else "New",
             "page": 1,
@@ -582,54 +1483,75 @@ class Lemmy:
         if person_id is not None:
             query["person_id"] = person_id
 
-        person_view = None
-        moderates = None
-
-        # content ids as keys to avoid double counting content if new content was added during pagination
-        posts: dict[str, Any] = {}
-        comments: dict[str, Any] = {}
-
-        j = None
-        broken = False
-        while not broken and (
-            limit is None or (len(posts) < limit and len(comments) < limit)
-        ):
-            if j is not None:
-                query["page"] += 1
+        return query
 
-            logger.debug(
-                "Retrieving %s page %s for %s",
-                url,
-                query["page"],
-                username if username is not None else person_id,
-            )
-            r = await self._get(url, params=query, raise_for_status=True)
-            j = await r.json()
-
-            person_view = j["person_view"]
-            moderates = j["moderates"]
+    async def get_person_content(
+        self,
+        username: str | None = None,
+        person_id: int | None = None,
+        sort: str | None = None,
+        *,
+        post_limit: int | None = 20,
+        comment_limit: int | None = 20,
+        prefetch: int = 0,
+    ) -> Any:
+        # Like get_person_details, but with separate limits for posts and comments,
+        # 0 to skip either and None for all of them. Each list is complete once it
+        # reaches its limit or a page returns fewer of its items than requested.
+        #
+        # Lemmy returns both lists on every page, so both are collected from a single
+        # sequence of pages, which ends once both are complete. person_view and
+        # moderates are taken from the first page.
+        url = f"{self._instance_base_url}/api/v3/user"
+        limits = {"posts": post_limit, "comments": comment_limit}
+        wanted = {key: limit for key, limit in limits.items() if limit != 0}
+        query = self._person_query(
+            username,
+            person_id,
+            sort,
+            # the pages are sized for the larger list, so the smaller one is included
+            None if None in wanted.values() else max(wanted.values(), default=1),
+        )
 
-            for post in j["posts"]:
-                if limit is not None and len(posts) >= limit:
-                    broken = True
-                    break
-                posts[post["post"]["id"]] = post
+        result: dict[str, Any] = {
+            "person_view": None,
+            "moderates": None,
+            # content ids as keys to avoid double counting content if new content was
+            # added during pagination
+            "posts": {},
+            "comments": {},
+        }
+        id_keys = {"posts": "post", "comments": "comment"}
 
-            for comment in j["comments"]:
-                if limit is not None and len(comments) >= limit:
-                    broken = True
+        pages = self._iter_pages(
+            url,
+            query,
+            f"{url} for {username if username is not None else person_id}",
+            prefetch,
+        )
+        async with aclosing(pages):
+            async for j in pages:
+                if result["person_view"] is None:
+                    result["person_view"] = j["person_view"]
+                    result["moderates"] = j["moderates"]
+
+                for key, limit in list(wanted.items()):
+                    items = result[key]
+                    for item in j[key]:
+                        if limit is not None and len(items) >= limit:
+                            break
+                        items[item[id_keys[key]]["id"]] = item
+
+                    if len(j[key]) < query["limit"] or (
+                        limit is not None and len(items) >= limit
+                    ):
+                        logger.debug("Retrieved all requested %s", key)
+                        del wanted[key]
+
+                if not wanted:
                     break
-                comments[comment["comment"]["id"]] = comment
 
-            if len(j["posts"]) < query["limit"] and len(j["comments"]) < query["limit"]:
-                break
-
-        return {
-            "person_view": person_view,
-            "moderates": moderates,
-            "posts": posts,
-            "comments": comments,
-        }
+        return result
 
     async def remove_post(
         self,
@@ -649,7 +1571,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def remove_comment(
         self,
@@ -669,7 +1591,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def report_post(
         self,
@@ -684,7 +1606,7 @@ class Lemmy:
             },
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def report_comment(
         self,
@@ -699,7 +1621,7 @@ class Lemmy:
             },
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def report_private_message(
         self,
@@ -714,7 +1636,7 @@ class Lemmy:
             },
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def ban_from_site(
         self,
@@ -741,7 +1663,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def add_mod_to_community(
         self,
@@ -760,7 +1682,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def ban_from_community(
         self,
@@ -789,7 +1711,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def remove_community(
         self,
@@ -810,7 +1732,7 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def hide_community(
         self,
@@ -831,15 +1753,17 @@ class Lemmy:
             json=payload,
         )
 
-        return await r.json()
+        return await self._json(r)
 
     async def get_modlog(
         self,
         community_id: int | None = None,
         mod_person_id: int | None = None,
         other_person_id: int | None = None,
-        type_: str | None = None,
+        type_: ModlogActionType | None = None,
         limit: int | None = 20,
+        *,
+        prefetch: int = 0,
     ) -> dict[str, dict[int, Any]]:
         url = f"{self._instance_base_url}/api/v3/modlog"
         query: GetApiV3ModlogParams = {
@@ -863,52 +1787,243 @@ class Lemmy:
 
         # Lemmy returns modlog entries by descending published date
 
-        j = None
-        broken = False
-        while not broken and (
-            limit is None
-            or all(len(records) < limit for records in modlog_records.values())
-        ):
-            if j is not None:
-                query["page"] += 1
-
-            logger.debug("Retrieving modlog page %s", query["page"])
-            r = await self._get(url, params=query, raise_for_status=True)
-            j = await r.json()
-
-            for k in j:
-                if k not in MODLOG_TYPES:
-                    logger.warning("received unexpected key in modlog response: %s", k)
-                    continue
+        pages = self._iter_pages(url, query, "modlog", prefetch)
+        async with aclosing(pages):
+            async for j in pages:
+                broken = False
+                for k in j:
+                    if k not in MODLOG_TYPES:
+                        logger.warning(
+                            "received unexpected key in modlog response: %s",
+                            k,
+                        )
+                        continue
 
-                if k not in modlog_records:
-                    modlog_records[k] = {}
+                    if k not in modlog_records:
+                        modlog_records[k] = {}
 
-                for record in j[k]:
-                    if limit is not None and len(modlog_records[k]) >= limit:
-                        broken = True
-                        break
-                    modlog_records[k][record[MODLOG_TYPES[k]]["id"]] = record
+                    for record in j[k]:
+                        if limit is not None and len(modlog_records[k]) >= limit:
+                            broken = True
+                            break
+                        modlog_records[k][record[MODLOG_TYPES[k]]["id"]] = record
+
+                if broken or (
+                    limit is not None
+                    and any(
+                        len(records) >= limit for records in modlog_records.values()
+                    )
+                ):
+                    break
+
+                if all(k in j and len(j[k]) < query["limit"] for k in MODLOG_TYPES):
+                    break
+
+        return modlog_records
+
+    async def get_modlog_by_type(
+        self,
+        community_id: int | None = None,
+        mod_person_id: int | None = None,
+        other_person_id: int | None = None,
+        *,
+        types: Iterable[str] | None = None,
+        limit: int | None = 20,
+        limits: Mapping[str, int | None] | None = None,
+        concurrency: int = 4,
+        prefetch: int = 0,
+    ) -> dict[str, dict[int, Any]]:
+        # Like get_modlog, but pages through each of the given types separately, with
+        # the modlog filtered to that type. Each type is limited to limit records,
+        # or its entry in limits, and ends independently of the others. Up to
+        # `concurrency` types are retrieved at the same time, prefetch applies to the
+        # pages of each type.
+        types = set(types) if types is not None else set(MODLOG_TYPES)
+        limits = dict(limits) if limits is not None else {}
+        if unknown_types := (types | limits.keys()) - MODLOG_TYPES.keys():
+            msg = f"unknown modlog types: {', '.join(sorted(unknown_types))}"
+            raise ValueError(msg)
+
+        url = f"{self._instance_base_url}/api/v3/modlog"
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(k: str) -> dict[int, Any]:
+            type_limit = limits.get(k, limit)
+            query: GetApiV3ModlogParams = {
+                "type_": MODLOG_ACTION_TYPES[k],
+                "page": 1,
+                "limit": (
+                    min(type_limit, PAGE_LIMIT_MAX)
+                    if type_limit is not None
+                    else PAGE_LIMIT_MAX
+                ),
+            }
+            if community_id is not None:
+                query["community_id"] = community_id
+            if mod_person_id is not None:
+                query["mod_person_id"] = mod_person_id
+            if other_person_id is not None:
+                query["other_person_id"] = other_person_id
+
+            # modlog record ids as keys to avoid double counting content if new
+            # content was added during pagination
+            records: dict[int, Any] = {}
+            async with semaphore:
+                pages = self._iter_pages(url, query, f"modlog {k}", prefetch)
+                async with aclosing(pages):
+                    async for j in pages:
+                        page = j.get(k, [])
+                        for record in page:
+                            if type_limit is not None and len(records) >= type_limit:
+                                break
+                            records[record[MODLOG_TYPES[k]]["id"]] = record
+
+                        if len(page) < query["limit"] or (
+                            type_limit is not None and len(records) >= type_limit
+                        ):
+                            break
+
+            return records
+
+        # in MODLOG_TYPES order, like get_modlog
+        ordered_types = [k for k in MODLOG_TYPES if k in types]
+        tasks = [asyncio.create_task(fetch(k)) for k in ordered_types]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return dict(zip(ordered_types, results, strict=True))
+
+    async def sync_modlog(
+        self,
+        store: CheckpointStore,
+        *,
+        community_id: int | None = None,
+        mod_person_id: int | None = None,
+        other_person_id: int | None = None,
+        types: Iterable[str] | None = None,
+        initial_limit: int | None = PAGE_LIMIT_MAX,
+        prefetch: int = 0,
+    ) -> dict[str, dict[int, Any]]:
+        # Retrieves modlog records added since the last sync with the same filters.
+        # The highest record id seen per type is kept in the checkpoint store, and
+        # pagination stops once every type has reached its previous high-water mark.
+        # Types without a checkpoint are limited to initial_limit records.
+        types = set(types) if types is not None else set(MODLOG_TYPES)
+        if unknown_types := types - MODLOG_TYPES.keys():
+            msg = f"unknown modlog types: {', '.join(sorted(unknown_types))}"
+            raise ValueError(msg)
+
+        key = f"modlog:{self._domain}:{community_id}:{mod_person_id}:{other_person_id}"
+        checkpoint: dict[str, dict[str, Any]] = await store.load(key) or {}
+
+        url = f"{self._instance_base_url}/api/v3/modlog"
+        query: GetApiV3ModlogParams = {
+            "page": 1,
+            "limit": PAGE_LIMIT_MAX,
+        }
+        if community_id is not None:
+            query["community_id"] = community_id
+        if mod_person_id is not None:
+            query["mod_person_id"] = mod_person_id
+        if other_person_id is not None:
+            query["other_person_id"] = other_person_id
 
-            if all(k in j and len(j[k]) < query["limit"] for k in MODLOG_TYPES):
-                break
+        modlog_records: dict[str, dict[int, Any]] = {k: {} for k in types}
+        done = set(MODLOG_TYPES.keys() - types)
+
+        # Lemmy returns modlog entries by descending published date
+
+        pages = self._iter_pages(url, query, "modlog", prefetch)
+        async with aclosing(pages):
+            async for j in pages:
+                for k, records in j.items():
+                    if k not in MODLOG_TYPES:
+                        logger.warning(
+                            "received unexpected key in modlog response: %s",
+                            k,
+                        )
+                        continue
+
+                    if k in done:
+                        continue
+
+                    mark = checkpoint.get(k, {}).get("id")
+                    for record in records:
+                        record_id = record[MODLOG_TYPES[k]]["id"]
+                        if mark is not None and record_id <= mark:
+                            done.add(k)
+                            break
+                        if (
+                            mark is None
+                            and initial_limit is not None
+                            and len(modlog_records[k]) >= initial_limit
+                        ):
+                            done.add(k)
+                            break
+                        modlog_records[k][record_id] = record
+
+                    if len(records) < query["limit"]:
+                        done.add(k)
+
+                if done >= MODLOG_TYPES.keys():
+                    break
+
+        for k, records in modlog_records.items():
+            if len(records) == 0:
+                continue
+
+            latest = records[max(records)][MODLOG_TYPES[k]]
+            checkpoint[k] = {"id": latest["id"], "when_": latest.get("when_")}
+
+        await store.save(key, checkpoint)
+
+        logger.debug(
+            "Retrieved %s new modlog records",
+            sum(len(records) for records in modlog_records.values()),
+        )
 
         return modlog_records
 
     async def resolve_object(self, q: str, /) -> Any:
-        r = await self._get(
+        return await self._get_json(
             f"{self._instance_base_url}/api/v3/resolve_object",
             params={"q": q},
             raise_for_status=False,
         )
-        return await r.json()
 
     async def get_federated_instances(self) -> Any:
+        return await self._get_cached_json(
+            f"{self._instance_base_url}/api/v3/federated_instances",
+        )
+
+    async def iter_federated_instances(
+        self,
+        *,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        # Yields ("linked" | "allowed" | "blocked", instance) while the response is
+        # being received, without decoding or holding the whole document at once.
+        # The response is neither taken from nor stored in the cache.
         r = await self._get(
             f"{self._instance_base_url}/api/v3/federated_instances",
+            stream=True,
         )
+        try:
+            self._check_json_content_type(r)
 
-        return await r.json()
+            items = iter_array_items(
+                r.content.iter_chunked(chunk_size),
+                FEDERATED_INSTANCE_LISTS,
+            )
+            async with aclosing(items):
+                async for (_, list_name), instance in items:
+                    yield list_name, instance
+        finally:
+            r.release()
 
     async def block_instance(self, instance_id: int, block: bool) -> Any:
         r = await self._post(
@@ -918,20 +2033,23 @@ class Lemmy:
                 "block": block,
             },
         )
+        await self.invalidate_cache("/api/v3/site", "/api/v3/federated_instances")
 
-        return await r.json()
+        return await self._json(r)
 
     async def get_site(self) -> Any:
-        r = await self._get(
-            f"{self._instance_base_url}/api/v3/site",
-        )
+        j = await self._get_cached_json(f"{self._instance_base_url}/api/v3/site")
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.update_from_site(j)
 
-        return await r.json()
+        return j
 
     async def edit_site(self, **kwargs: Any) -> Any:
         r = await self._put(
             f"{self._instance_base_url}/api/v3/site",
             json=kwargs,
         )
+        await self.invalidate_cache("/api/v3/site", "/api/v3/federated_instances")
 
-        return await r.json()
+        return await self._json(r)